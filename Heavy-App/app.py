@@ -1,16 +1,28 @@
 
 #!/usr/bin/env python3
-from flask import Flask, jsonify, request, render_template_string
+from flask import Flask, Response, jsonify, request, render_template_string
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 import threading
 import time
 import random
-import hashlib
 import json
 import os
+import io
+import csv
+import mmap
+import resource
 from datetime import datetime
 
+from cache import ByteLRUCache
+from compute import ComputePool, ComputeBusy, available_cpus, ENGINES
+from db_pool import ConnectionPool
+from jobs import JobManager, JobQueueFull, JobStore
+from latency import LatencyHistogram, merge_all
+from scheduler import Scheduler
+from schema import (MIGRATIONS, SCHEDULER_LOCK_KEY, migrate, plan_summary, ensure_partitions,
+                    drop_expired_partitions, refresh_rollup, estimate_row_count)
+
 app = Flask(__name__)
 
 # Database configuration
@@ -22,65 +34,204 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD', 'postgres123')
 }
 
+# Shared connection pool used by every route and worker thread
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    minconn=int(os.getenv('DB_POOL_MIN', 2)),
+    maxconn=int(os.getenv('DB_POOL_MAX', 10)),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', 10))
+)
+
+# CPU-bound work runs in worker processes; COMPUTE_WORKERS=0 keeps it in-process
+compute_pool = ComputePool(
+    workers=int(os.getenv('COMPUTE_WORKERS') or available_cpus()),
+    chunk_size=int(os.getenv('COMPUTE_CHUNK_ITERATIONS', 250000)),
+    queue_size=int(os.getenv('COMPUTE_QUEUE_SIZE', 0)) or None,
+    timeout=float(os.getenv('COMPUTE_TIMEOUT', 30))
+)
+
+# Long stress runs are submitted as jobs so request threads return at once
+# (limits are per server worker process; snapshots are shared through Postgres)
+job_store = JobStore(db_pool)
+job_manager = JobManager(
+    workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_pending=int(os.getenv('JOB_QUEUE_DEPTH', 4)),
+    store=job_store
+)
+JOB_STREAM_KEEPALIVE = 15
+JOB_RETENTION_HOURS = 24
+
 # Global memory storage
-memory_cache = {}
+# Byte-budgeted so memory stress stays under the container limit
+memory_cache = ByteLRUCache(
+    max_bytes=int(float(os.getenv('MEMORY_CACHE_MB', 64)) * 1024 * 1024),
+    ttl=float(os.getenv('MEMORY_CACHE_TTL', 300)) or None
+)
 computation_results = []
-background_tasks = []
+
+# Bulk write paths for performance_data rows of (metric_name, metric_value, metadata)
+INSERT_MODES = ('row', 'batch', 'copy')
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 500))
+
+def insert_metrics(cur, rows, mode='batch'):
+    """Insert many performance_data rows in as few round-trips as possible"""
+    if mode == 'copy':
+        # COPY streams every row in a single statement
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        cur.copy_expert('''
+            COPY performance_data (metric_name, metric_value, metadata) FROM STDIN WITH (FORMAT csv)
+        ''', buf)
+    elif mode == 'batch':
+        # One multi-row INSERT ... VALUES for the whole batch
+        execute_values(cur, '''
+            INSERT INTO performance_data (metric_name, metric_value, metadata) VALUES %s
+        ''', rows, page_size=max(len(rows), 1))
+    else:
+        cur.executemany('''
+            INSERT INTO performance_data (metric_name, metric_value, metadata)
+            VALUES (%s, %s, %s)
+        ''', rows)
+
+# performance_data is partitioned by day; old partitions are dropped whole
+PERF_RETENTION_DAYS = int(os.getenv('PERF_RETENTION_DAYS', 7))
+PARTITION_DAYS_AHEAD = int(os.getenv('PARTITION_DAYS_AHEAD', 3))
+# How often raw rows are folded into the per-minute rollup
+ROLLUP_INTERVAL = float(os.getenv('ROLLUP_INTERVAL', 30))
+PARTITION_CHECK_INTERVAL = 3600
+# Same average load as the former three workers looping every 5 s
+BACKGROUND_INTERVAL = float(os.getenv('BACKGROUND_INTERVAL', 5 / 3))
+
+# Hot read queries, shared with the /api/db/explain self-check.
+# Recent averages come from the per-minute rollup, not the raw rows.
+RECENT_METRICS_QUERY = '''
+    SELECT metric_name,
+           SUM(sum_value) / NULLIF(SUM(sample_count), 0) as avg_value,
+           MIN(min_value) as min_value,
+           MAX(max_value) as max_value,
+           SUM(sample_count)::bigint as samples
+    FROM performance_rollup_1m
+    WHERE bucket >= date_trunc('minute', LOCALTIMESTAMP - INTERVAL '5 minutes')
+    GROUP BY metric_name
+'''
+RECENT_TEST_METRICS_QUERY = '''
+    SELECT * FROM performance_data 
+    WHERE metric_name LIKE %s 
+    ORDER BY timestamp DESC 
+    LIMIT 10
+'''
+
+def select_recent_test_metrics(cur):
+    cur.execute(RECENT_TEST_METRICS_QUERY, ('test_metric_%',))
+    return cur.fetchall()
+
+# Estimated performance_data size for the landing page, cached per process
+ROW_COUNT_TTL = float(os.getenv('ROW_COUNT_TTL', 30))
+row_count_cache = {'value': 0, 'updated': 0}
+row_count_lock = threading.Lock()
+
+def get_db_record_count():
+    """Return the cached row estimate, refreshing it once it is older than ROW_COUNT_TTL"""
+    if time.time() - row_count_cache['updated'] < ROW_COUNT_TTL:
+        return row_count_cache['value']
+    # Only one request refreshes; the rest keep serving the previous value
+    if not row_count_lock.acquire(blocking=False):
+        return row_count_cache['value']
+    try:
+        with db_pool.connection() as conn:
+            row_count_cache['value'] = estimate_row_count(conn)
+    except Exception as e:
+        print(f"Row count refresh error: {e}")
+    finally:
+        row_count_cache['updated'] = time.time()
+        row_count_lock.release()
+    return row_count_cache['value']
 
 # Initialize database
 def init_db():
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        # Create tables
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS performance_data (
-                id SERIAL PRIMARY KEY,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                metric_name VARCHAR(50),
-                metric_value FLOAT,
-                metadata JSONB
-            )
-        ''')
-        
-        cur.execute('''
-            CREATE TABLE IF NOT EXISTS computation_results (
-                id SERIAL PRIMARY KEY,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                computation_type VARCHAR(50),
-                input_size INTEGER,
-                result TEXT,
-                duration_ms FLOAT
-            )
-        ''')
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            
+            # Create tables
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS performance_data (
+                    id SERIAL PRIMARY KEY,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    metric_name VARCHAR(50),
+                    metric_value FLOAT,
+                    metadata JSONB
+                )
+            ''')
+            
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS computation_results (
+                    id SERIAL PRIMARY KEY,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    computation_type VARCHAR(50),
+                    input_size INTEGER,
+                    result TEXT,
+                    duration_ms FLOAT
+                )
+            ''')
+            
+            conn.commit()
+            cur.close()
+            
+            # Indexes and other schema changes
+            migrate(conn)
+            ensure_partitions(conn, PARTITION_DAYS_AHEAD)
         print("Database initialized successfully")
     except Exception as e:
         print(f"Database initialization error: {e}")
 
 # CPU-intensive function
-def cpu_intensive_task(iterations=1000000):
-    """Perform CPU-intensive calculations"""
-    start_time = time.time()
-    result = 0
-    for i in range(iterations):
-        result += i ** 2 * random.random()
-        if i % 1000 == 0:
-            # Create some string operations to increase CPU usage
-            temp = hashlib.sha256(str(result).encode()).hexdigest()
-    
-    duration = (time.time() - start_time) * 1000  # ms
-    return result, duration
+def cpu_intensive_task(iterations=1000000, engine='python'):
+    """Perform CPU-intensive calculations on the compute pool"""
+    return compute_pool.cpu_task(iterations, engine)
 
 # Memory-intensive function
-def memory_intensive_task(size_mb=10):
+MEMORY_MODES = ('string', 'bytearray', 'mmap')
+PAGE_SIZE = mmap.PAGESIZE
+CHUNK_BYTES = 1024 * 1024
+
+def memory_snapshot():
+    """Resident set size and page-fault counters for before/after deltas"""
+    with open('/proc/self/statm') as f:
+        rss_pages = int(f.read().split()[1])
+    # Per-thread faults where available, so concurrent requests don't show up
+    who = getattr(resource, 'RUSAGE_THREAD', resource.RUSAGE_SELF)
+    usage = resource.getrusage(who)
+    return {
+        'rss_bytes': rss_pages * PAGE_SIZE,
+        'minor_faults': usage.ru_minflt,
+        'major_faults': usage.ru_majflt
+    }
+
+def allocate_buffer(mode):
+    """1MB writable buffer with one byte written per page, without copies"""
+    if mode == 'mmap':
+        # Anonymous mapping: pages are only faulted in by the writes below
+        buf = memoryview(mmap.mmap(-1, CHUNK_BYTES))
+    else:
+        buf = memoryview(bytearray(CHUNK_BYTES))
+    buf[::PAGE_SIZE] = b'X' * (CHUNK_BYTES // PAGE_SIZE)
+    return buf
+
+def memory_intensive_task(size_mb=10, mode='string'):
     """Allocate memory and perform operations"""
     start_time = time.time()
     
+    if mode != 'string':
+        # Zero-copy: buffers are measured in place instead of joined
+        result = 0
+        for i in range(size_mb):
+            buf = allocate_buffer(mode)
+            memory_cache.set(f'chunk_{i}_{time.time()}', buf)
+            result += buf.nbytes
+        return result, (time.time() - start_time) * 1000
+    
     # Allocate memory
     data = []
     for i in range(size_mb):
@@ -88,7 +239,7 @@ def memory_intensive_task(size_mb=10):
         chunk = 'X' * (1024 * 1024)
         data.append(chunk)
         # Store in cache
-        memory_cache[f'chunk_{i}_{time.time()}'] = chunk
+        memory_cache.set(f'chunk_{i}_{time.time()}', chunk)
     
     # Perform operations on data
     result = len(''.join(data))
@@ -96,57 +247,112 @@ def memory_intensive_task(size_mb=10):
     
     return result, duration
 
-# Background worker thread
-def background_worker():
-    """Continuously perform background tasks"""
+# Background load, run by the scheduler instead of free-running threads
+def insert_background_metrics():
+    """Insert one row per background metric"""
+    with db_pool.connection() as conn:
+        cur = conn.cursor()
+        metrics = ['cpu_load', 'memory_usage', 'request_count', 'error_rate']
+        insert_metrics(cur, [
+            (metric, random.uniform(0, 100), json.dumps({'source': 'background_worker'}))
+            for metric in metrics
+        ])
+        conn.commit()
+        cur.close()
+
+def background_computation():
+    result, duration = cpu_intensive_task(100000)
+    computation_results.append({
+        'timestamp': datetime.now().isoformat(),
+        'result': result,
+        'duration': duration
+    })
+    
+    # Keep only last 100 results to prevent unlimited growth
+    if len(computation_results) > 100:
+        computation_results.pop(0)
+
+def maintain_partitions():
+    """Keep partitions ahead of the clock and enforce retention"""
+    with db_pool.connection() as conn:
+        ensure_partitions(conn, PARTITION_DAYS_AHEAD)
+        dropped = drop_expired_partitions(conn, PERF_RETENTION_DAYS)
+    if dropped:
+        print(f"Dropped expired partitions: {', '.join(dropped)}")
+
+def refresh_metrics_rollup():
+    with db_pool.connection() as conn:
+        refresh_rollup(conn)
+
+def purge_old_jobs():
+    job_store.purge(JOB_RETENTION_HOURS)
+
+def build_scheduler():
+    sched = Scheduler(
+        max_concurrency=int(os.getenv('SCHEDULER_CONCURRENCY', 2)),
+        jitter=float(os.getenv('SCHEDULER_JITTER', 0.2)),
+        backoff_max=float(os.getenv('SCHEDULER_BACKOFF_MAX', 60))
+    )
+    sched.add('insert_metrics', insert_background_metrics, BACKGROUND_INTERVAL)
+    sched.add('computation', background_computation, BACKGROUND_INTERVAL)
+    sched.add('rollup', refresh_metrics_rollup, ROLLUP_INTERVAL)
+    sched.add('partitions', maintain_partitions, PARTITION_CHECK_INTERVAL)
+    sched.add('job_cleanup', purge_old_jobs, 3600)
+    return sched
+
+# Background load runs in one process only (see scheduler_leader); per-process
+# housekeeping runs in every server worker
+scheduler = build_scheduler()
+local_scheduler = Scheduler(max_concurrency=1)
+local_scheduler.add('cache_purge', memory_cache.purge_expired, 30)
+SCHEDULER_LEADER_CHECK = 10
+# Set while this process holds the lock and runs the background scheduler
+scheduler_leading = threading.Event()
+
+def scheduler_leader():
+    """Run the background scheduler while this process holds the advisory lock.
+
+    The lock lives on a dedicated session, so when the leading worker exits
+    or loses its connection another worker takes over within a check period.
+    """
     while True:
+        conn = None
+        leading = False
         try:
-            # Simulate database operations
             conn = psycopg2.connect(**DB_CONFIG)
+            conn.autocommit = True
             cur = conn.cursor()
-            
-            # Insert random metrics
-            metrics = ['cpu_load', 'memory_usage', 'request_count', 'error_rate']
-            for metric in metrics:
-                value = random.uniform(0, 100)
-                cur.execute('''
-                    INSERT INTO performance_data (metric_name, metric_value, metadata)
-                    VALUES (%s, %s, %s)
-                ''', (metric, value, json.dumps({'source': 'background_worker'})))
-            
-            conn.commit()
-            cur.close()
-            conn.close()
-            
-            # Perform some computation
-            result, duration = cpu_intensive_task(100000)
-            computation_results.append({
-                'timestamp': datetime.now().isoformat(),
-                'result': result,
-                'duration': duration
-            })
-            
-            # Keep only last 100 results to prevent unlimited growth
-            if len(computation_results) > 100:
-                computation_results.pop(0)
-            
-            # Clean old cache entries
-            if len(memory_cache) > 50:
-                keys = list(memory_cache.keys())
-                for key in keys[:10]:
-                    del memory_cache[key]
-            
-            time.sleep(5)  # Wait 5 seconds before next iteration
-            
+            cur.execute('SELECT pg_try_advisory_lock(%s)', (SCHEDULER_LOCK_KEY,))
+            if cur.fetchone()[0]:
+                leading = True
+                print(f"Process {os.getpid()} is running the background scheduler")
+                scheduler.start()
+                scheduler_leading.set()
+                while True:
+                    time.sleep(SCHEDULER_LEADER_CHECK)
+                    cur.execute('SELECT 1')
         except Exception as e:
-            print(f"Background worker error: {e}")
-            time.sleep(10)
+            print(f"Scheduler leader error: {e}")
+        finally:
+            if leading:
+                scheduler_leading.clear()
+                scheduler.stop()
+            if conn is not None:
+                conn.close()
+        time.sleep(SCHEDULER_LEADER_CHECK)
+
+def scheduler_metrics():
+    """Task stats from the leading process; other workers run no background tasks"""
+    if not scheduler_leading.is_set():
+        return {'leader': False}
+    return {'leader': True, **scheduler.metrics()}
 
-# Start background workers
-for i in range(3):  # Start 3 background workers
-    thread = threading.Thread(target=background_worker, daemon=True)
-    thread.start()
-    background_tasks.append(thread)
+# Started after init_db(), never at import, so compute worker processes
+# (which re-import this module) stay idle. Under gunicorn this runs once in
+# every worker from the post_worker_init hook.
+def start_background_workers():
+    local_scheduler.start()
+    threading.Thread(target=scheduler_leader, name='scheduler-leader', daemon=True).start()
 
 @app.route('/')
 def index():
@@ -200,11 +406,11 @@ def index():
             </div>
             <div class="metric">
                 <h3>Background Tasks</h3>
-                <div class="value">{{ tasks_count }} running</div>
+                <div class="value">{{ tasks_count }} scheduled</div>
             </div>
             <div class="metric">
                 <h3>Database Records</h3>
-                <div class="value">{{ db_records }} total</div>
+                <div class="value">~{{ db_records }} total</div>
             </div>
         </div>
         
@@ -221,9 +427,12 @@ def index():
             <li><a href="/">/</a> - Main dashboard</li>
             <li><a href="/health">/health</a> - Health check</li>
             <li><a href="/api/stats">/api/stats</a> - System statistics</li>
+            <li><a href="/api/db/explain">/api/db/explain</a> - Query plan self-check</li>
             <li><a href="/api/cpu-intensive">/api/cpu-intensive</a> - CPU intensive task</li>
-            <li><a href="/api/memory-intensive">/api/memory-intensive</a> - Memory intensive task</li>
-            <li><a href="/api/database-intensive">/api/database-intensive</a> - Database intensive task</li>
+            <li><a href="/api/cpu-intensive?engine=numpy">/api/cpu-intensive?engine=numpy</a> - Same workload, vectorized</li>
+            <li><a href="/api/memory-intensive">/api/memory-intensive</a> - Memory intensive task (mode=string|bytearray|mmap)</li>
+            <li><a href="/api/database-intensive">/api/database-intensive</a> - Database intensive task (mode=row|batch|copy)</li>
+            <li><a href="/api/jobs">/api/jobs</a> - Background jobs (POST to submit, /api/jobs/&lt;id&gt;?stream=1 to follow)</li>
         </ul>
         
         <script>
@@ -250,9 +459,25 @@ def index():
             }
             
             function runCombinedTest() {
-                fetch('/api/combined-stress?duration=30')
+                // Runs as a background job; poll it until it finishes
+                fetch('/api/jobs', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({type: 'combined-stress', params: {duration: 30}})
+                })
                     .then(response => response.json())
-                    .then(data => updateResults(data));
+                    .then(data => {
+                        if (!data.url) { updateResults(data); return; }
+                        const poll = () => fetch(data.url)
+                            .then(response => response.json())
+                            .then(job => {
+                                updateResults(job);
+                                if (job.status === 'queued' || job.status === 'running') {
+                                    setTimeout(poll, 1000);
+                                }
+                            });
+                        poll();
+                    });
             }
         </script>
     </body>
@@ -260,20 +485,12 @@ def index():
     '''
     
     # Get current statistics
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        cur.execute("SELECT COUNT(*) FROM performance_data")
-        db_records = cur.fetchone()[0]
-        cur.close()
-        conn.close()
-    except:
-        db_records = 0
+    db_records = get_db_record_count()
     
     return render_template_string(html_template,
         cache_size=len(memory_cache),
         results_count=len(computation_results),
-        tasks_count=len([t for t in background_tasks if t.is_alive()]),
+        tasks_count=len(scheduler.tasks),
         db_records=db_records
     )
 
@@ -281,8 +498,10 @@ def index():
 def health():
     try:
         # Check database connection
-        conn = psycopg2.connect(**DB_CONFIG)
-        conn.close()
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT 1')
+            cur.close()
         return 'healthy\n', 200
     except:
         return 'unhealthy\n', 500
@@ -290,27 +509,56 @@ def health():
 @app.route('/api/stats')
 def stats():
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # Get recent metrics
-        cur.execute('''
-            SELECT metric_name, AVG(metric_value) as avg_value
-            FROM performance_data
-            WHERE timestamp > NOW() - INTERVAL '5 minutes'
-            GROUP BY metric_name
-        ''')
-        metrics = cur.fetchall()
-        
-        cur.close()
-        conn.close()
+        with db_pool.connection() as conn:
+            cur = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # Get recent metrics
+            cur.execute(RECENT_METRICS_QUERY)
+            metrics = cur.fetchall()
+            
+            cur.close()
         
         return jsonify({
             'timestamp': datetime.now().isoformat(),
             'memory_cache_size': len(memory_cache),
+            'memory_cache': memory_cache.metrics(),
             'computation_results': len(computation_results),
-            'background_tasks': len([t for t in background_tasks if t.is_alive()]),
-            'recent_metrics': metrics
+            'background_tasks': len(scheduler.tasks),
+            'recent_metrics': metrics,
+            'db_pool': db_pool.metrics(),
+            'compute_pool': compute_pool.metrics(),
+            'jobs': job_manager.metrics(),
+            'scheduler': scheduler_metrics(),
+            'worker_pid': os.getpid()
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/db/explain')
+def api_db_explain():
+    """Report the plans Postgres picks for the hot queries"""
+    analyze = request.args.get('analyze', '0') == '1'
+    queries = {
+        'recent_metrics': (RECENT_METRICS_QUERY, None),
+        'recent_test_metrics': (RECENT_TEST_METRICS_QUERY, ('test_metric_%',)),
+    }
+    try:
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            plans = {}
+            for name, (query, params) in queries.items():
+                options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+                cur.execute(f'EXPLAIN ({options}) {query}', params)
+                plans[name] = plan_summary(cur.fetchone()[0][0])
+            cur.execute('SELECT version, name, applied_at FROM schema_migrations ORDER BY version')
+            applied = [{'version': v, 'name': n, 'applied_at': a.isoformat()} for v, n, a in cur.fetchall()]
+            cur.close()
+        
+        return jsonify({
+            'analyze': analyze,
+            'plans': plans,
+            'migrations': applied,
+            'pending_migrations': [m[0] for m in MIGRATIONS if m[0] not in {a['version'] for a in applied}]
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -318,127 +566,156 @@ def stats():
 @app.route('/api/cpu-intensive')
 def api_cpu_intensive():
     iterations = int(request.args.get('iterations', 1000000))
-    result, duration = cpu_intensive_task(iterations)
+    engine = request.args.get('engine', 'python')
+    try:
+        result, duration = cpu_intensive_task(iterations, engine)
+    except ValueError as e:
+        return jsonify({'error': str(e), 'engines': list(ENGINES)}), 400
+    except ComputeBusy as e:
+        return jsonify({'error': str(e)}), 503
     
     # Store result in database
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        cur.execute('''
-            INSERT INTO computation_results (computation_type, input_size, result, duration_ms)
-            VALUES (%s, %s, %s, %s)
-        ''', ('cpu_intensive', iterations, str(result), duration))
-        conn.commit()
-        cur.close()
-        conn.close()
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute('''
+                INSERT INTO computation_results (computation_type, input_size, result, duration_ms)
+                VALUES (%s, %s, %s, %s)
+            ''', ('cpu_intensive', iterations, str(result), duration))
+            conn.commit()
+            cur.close()
     except Exception as e:
         print(f"Database error: {e}")
     
     return jsonify({
         'type': 'cpu_intensive',
+        'engine': engine,
         'iterations': iterations,
         'result': result,
-        'duration_ms': duration
+        'duration_ms': duration,
+        'iterations_per_sec': iterations / (duration / 1000) if duration else None
     })
 
 @app.route('/api/memory-intensive')
 def api_memory_intensive():
     size_mb = int(request.args.get('size_mb', 10))
-    result, duration = memory_intensive_task(size_mb)
+    mode = request.args.get('mode', 'string')
+    if mode not in MEMORY_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(MEMORY_MODES)}"}), 400
+    before = memory_snapshot()
+    result, duration = memory_intensive_task(size_mb, mode)
+    after = memory_snapshot()
     
     return jsonify({
         'type': 'memory_intensive',
+        'mode': mode,
         'size_mb': size_mb,
         'result': result,
         'duration_ms': duration,
-        'cache_size': len(memory_cache)
+        'rss_delta_bytes': after['rss_bytes'] - before['rss_bytes'],
+        'minor_faults': after['minor_faults'] - before['minor_faults'],
+        'major_faults': after['major_faults'] - before['major_faults'],
+        'cache_size': len(memory_cache),
+        'cache_bytes': memory_cache.metrics()['bytes']
     })
 
 @app.route('/api/database-intensive')
 def api_database_intensive():
     operations = int(request.args.get('operations', 100))
+    mode = request.args.get('mode', 'row')
+    batch_size = max(1, int(request.args.get('batch_size', DB_BATCH_SIZE)))
+    if mode not in INSERT_MODES:
+        return jsonify({'error': f"mode must be one of {', '.join(INSERT_MODES)}"}), 400
     start_time = time.time()
     
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
-        
-        # Perform many database operations
-        for i in range(operations):
-            # Insert
-            cur.execute('''
-                INSERT INTO performance_data (metric_name, metric_value, metadata)
-                VALUES (%s, %s, %s)
-            ''', (f'test_metric_{i}', random.uniform(0, 100), json.dumps({'iteration': i})))
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
             
-            # Select
-            if i % 10 == 0:
-                cur.execute('''
-                    SELECT * FROM performance_data 
-                    WHERE metric_name LIKE %s 
-                    ORDER BY timestamp DESC 
-                    LIMIT 10
-                ''', (f'test_metric_%',))
-                results = cur.fetchall()
-        
-        conn.commit()
-        cur.close()
-        conn.close()
+            if mode == 'row':
+                # Perform many database operations, one round-trip each
+                for i in range(operations):
+                    # Insert
+                    cur.execute('''
+                        INSERT INTO performance_data (metric_name, metric_value, metadata)
+                        VALUES (%s, %s, %s)
+                    ''', (f'test_metric_{i}', random.uniform(0, 100), json.dumps({'iteration': i})))
+                    
+                    # Select
+                    if i % 10 == 0:
+                        select_recent_test_metrics(cur)
+            else:
+                # Same rows written `batch_size` at a time, one select per batch
+                for offset in range(0, operations, batch_size):
+                    rows = [(f'test_metric_{i}', random.uniform(0, 100), json.dumps({'iteration': i}))
+                            for i in range(offset, min(offset + batch_size, operations))]
+                    insert_metrics(cur, rows, mode)
+                    select_recent_test_metrics(cur)
+            
+            conn.commit()
+            cur.close()
         
         duration = (time.time() - start_time) * 1000
         
         return jsonify({
             'type': 'database_intensive',
             'operations': operations,
-            'duration_ms': duration
+            'mode': mode,
+            'batch_size': batch_size if mode != 'row' else 1,
+            'duration_ms': duration,
+            'rows_per_sec': operations / (duration / 1000) if duration else 0
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/combined-stress')
-def api_combined_stress():
-    duration = int(request.args.get('duration', 10))  # seconds
+def run_combined_stress(duration, job=None):
+    """Run 5 mixed CPU/memory/database workers for `duration` seconds"""
     start_time = time.time()
-    results = []
+    # One {op_type: LatencyHistogram} per worker, only touched by that worker
+    worker_stats = [{op: LatencyHistogram() for op in ('cpu', 'memory', 'database')}
+                    for i in range(5)]
+    errors = [0] * 5
     
     # Start multiple threads for combined stress
     def stress_worker(worker_id):
-        worker_results = []
+        stats = worker_stats[worker_id]
         end_time = start_time + duration
         
         while time.time() < end_time:
             # CPU task
-            cpu_result, cpu_duration = cpu_intensive_task(100000)
-            worker_results.append({
-                'worker_id': worker_id,
-                'type': 'cpu',
-                'duration_ms': cpu_duration
-            })
+            try:
+                cpu_result, cpu_duration = cpu_intensive_task(100000)
+                stats['cpu'].record(cpu_duration)
+            except ComputeBusy as e:
+                errors[worker_id] += 1
+                print(f"Compute pool busy in worker {worker_id}: {e}")
             
             # Memory task
             mem_result, mem_duration = memory_intensive_task(5)
-            worker_results.append({
-                'worker_id': worker_id,
-                'type': 'memory',
-                'duration_ms': mem_duration
-            })
+            stats['memory'].record(mem_duration)
             
             # Database task
             try:
-                conn = psycopg2.connect(**DB_CONFIG)
-                cur = conn.cursor()
-                for i in range(10):
-                    cur.execute('''
-                        INSERT INTO performance_data (metric_name, metric_value, metadata)
-                        VALUES (%s, %s, %s)
-                    ''', (f'stress_test_{worker_id}', random.uniform(0, 100), json.dumps({'worker': worker_id})))
-                conn.commit()
-                cur.close()
-                conn.close()
+                db_start = time.time()
+                with db_pool.connection() as conn:
+                    cur = conn.cursor()
+                    insert_metrics(cur, [
+                        (f'stress_test_{worker_id}', random.uniform(0, 100), json.dumps({'worker': worker_id}))
+                        for i in range(10)
+                    ])
+                    conn.commit()
+                    cur.close()
+                stats['database'].record((time.time() - db_start) * 1000)
             except Exception as e:
+                errors[worker_id] += 1
                 print(f"DB error in worker {worker_id}: {e}")
-        
-        results.extend(worker_results)
+            
+            if job is not None:
+                job.update(
+                    progress={'elapsed_seconds': round(time.time() - start_time, 2)},
+                    worker_id=worker_id,
+                    worker_result={op: h.count for op, h in stats.items()}
+                )
     
     # Start stress workers
     threads = []
@@ -452,16 +729,127 @@ def api_combined_stress():
         thread.join()
     
     total_duration = (time.time() - start_time) * 1000
+    latency = merge_all(worker_stats)
     
-    return jsonify({
+    return {
         'type': 'combined_stress',
         'duration_seconds': duration,
         'total_duration_ms': total_duration,
-        'operations_performed': len(results),
+        'operations_performed': sum(h.count for h in latency.values()),
+        'errors': sum(errors),
+        'latency': {op: h.to_dict() for op, h in latency.items()},
         'cache_size': len(memory_cache),
         'computation_results': len(computation_results)
+    }
+
+@app.route('/api/combined-stress')
+def api_combined_stress():
+    duration = int(request.args.get('duration', 10))  # seconds
+    return jsonify(run_combined_stress(duration))
+
+# Job types accepted by POST /api/jobs: fn(job, **params) -> result dict
+def combined_stress_job(job, duration=10):
+    job.update(progress={'duration_seconds': int(duration)})
+    return run_combined_stress(int(duration), job)
+
+def cpu_intensive_job(job, iterations=1000000, engine='python'):
+    result, duration = cpu_intensive_task(int(iterations), engine)
+    return {'type': 'cpu_intensive', 'engine': engine, 'iterations': int(iterations),
+            'result': result, 'duration_ms': duration}
+
+def memory_intensive_job(job, size_mb=10, mode='string'):
+    result, duration = memory_intensive_task(int(size_mb), mode)
+    return {'type': 'memory_intensive', 'mode': mode, 'size_mb': int(size_mb),
+            'result': result, 'duration_ms': duration}
+
+JOB_TYPES = {
+    'combined-stress': combined_stress_job,
+    'cpu-intensive': cpu_intensive_job,
+    'memory-intensive': memory_intensive_job
+}
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    body = request.get_json(silent=True) or {}
+    kind = body.get('type')
+    params = body.get('params') or {}
+    if kind not in JOB_TYPES:
+        return jsonify({'error': f"type must be one of {', '.join(JOB_TYPES)}"}), 400
+    try:
+        job = job_manager.submit(kind, JOB_TYPES[kind], params)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429, {'Retry-After': '5'}
+    return jsonify({'id': job.id, 'status': job.status, 'url': f'/api/jobs/{job.id}'}), 202
+
+@app.route('/api/jobs')
+def api_list_jobs():
+    try:
+        jobs = job_store.recent()
+    except Exception as e:
+        # Database unavailable: this process's jobs are still known
+        print(f"Job store error: {e}")
+        jobs = [{'id': job.id, 'type': job.kind, 'status': job.status} for job in job_manager.list()]
+    return jsonify({
+        'jobs': jobs,
+        'metrics': job_manager.metrics()
     })
 
+def stored_job_stream(job_id, snapshot):
+    """Follow a job that runs in another worker process by polling the job store"""
+    version = -1
+    idle = 0
+    while snapshot is not None:
+        if snapshot['version'] != version:
+            version = snapshot['version']
+            idle = 0
+            yield json.dumps(snapshot) + '\n'
+        if snapshot['status'] in ('succeeded', 'failed'):
+            return
+        time.sleep(job_manager.save_interval)
+        idle += job_manager.save_interval
+        if idle >= JOB_STREAM_KEEPALIVE:
+            idle = 0
+            yield '\n'
+        snapshot = job_store.load(job_id)
+
+@app.route('/api/jobs/<job_id>')
+def api_get_job(job_id):
+    """Job snapshot; ?stream=1 sends one JSON line per change until the job ends"""
+    stream = request.args.get('stream', '0') == '1'
+    job = job_manager.get(job_id)
+    if job is None:
+        # Submitted to another worker process
+        try:
+            snapshot = job_store.load(job_id)
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+        if snapshot is None:
+            return jsonify({'error': 'unknown job'}), 404
+        if not stream:
+            return jsonify(snapshot)
+        return Response(stored_job_stream(job_id, snapshot), mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    if not stream:
+        return jsonify(job.snapshot())
+    
+    def generate():
+        version = -1
+        while True:
+            snapshot = job.snapshot()
+            if snapshot['version'] != version:
+                version = snapshot['version']
+                yield json.dumps(snapshot) + '\n'
+            if snapshot['status'] in ('succeeded', 'failed'):
+                return
+            job.wait(version, timeout=JOB_STREAM_KEEPALIVE)
+            if job.version == version:
+                # Blank keepalive line so proxies don't drop an idle stream
+                yield '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 if __name__ == '__main__':
     init_db()
+    start_background_workers()
     app.run(host='0.0.0.0', port=80, debug=False)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Thread-safe in-process cache bounded by a byte budget.
+
+Entries are evicted least-recently-used first, and after `ttl` seconds, at
+insert time, so the cache can never grow past `max_bytes` between cleanups.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def sizeof(value):
+    """Bytes held by a cached value (memoryviews count the buffer they expose)"""
+    if isinstance(value, memoryview):
+        return value.nbytes
+    return sys.getsizeof(value)
+
+
+class ByteLRUCache:
+    """LRU + TTL cache; `set` evicts until the new entry fits in `max_bytes`"""
+
+    def __init__(self, max_bytes, ttl=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # key -> (value, size, stored_at), oldest use first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._rejected = 0
+
+    def _remove(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def _purge_expired(self, now):
+        if self.ttl is None:
+            return
+        # Ordered by last use, not insert time, so every entry is checked
+        for key in [k for k, (_, _, stored_at) in self._entries.items() if now - stored_at > self.ttl]:
+            self._remove(key)
+            self._expirations += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and time.monotonic() - entry[2] > self.ttl):
+                if entry is not None:
+                    self._remove(key)
+                    self._expirations += 1
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def set(self, key, value, size=None):
+        """Store `value`; returns False if it alone exceeds the byte budget"""
+        size = sizeof(value) if size is None else size
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self._rejected += 1
+                return False
+            now = time.monotonic()
+            self._purge_expired(now)
+            while self._bytes + size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+            self._entries[key] = (value, size, now)
+            self._bytes += size
+            return True
+
+    def purge_expired(self):
+        with self._lock:
+            self._purge_expired(time.monotonic())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'rejected': self._rejected
+            }
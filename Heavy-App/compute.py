@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Process-pool compute tier for CPU-bound work.
+
+Pure-Python loops hold the GIL, so running them on request threads keeps
+them on one core. Jobs submitted here are split into chunks and run in
+worker processes; the number of chunks queued or running is bounded so a
+burst of requests gets backpressure instead of an unbounded backlog.
+"""
+import hashlib
+import math
+import multiprocessing
+import os
+import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import numpy as np
+except ImportError:  # the numpy engine is optional
+    np = None
+
+ENGINES = ('python', 'numpy')
+# Elements per array in the numpy engine, bounding its memory per worker
+NUMPY_BLOCK = 65536
+
+
+class ComputeBusy(Exception):
+    """The compute queue stayed full for the whole submit timeout"""
+
+
+class ComputeBroken(ComputeBusy):
+    """A worker process died (e.g. OOM-killed); the pool is rebuilt on the next submit"""
+
+
+def available_cpus():
+    """CPUs this container may use: affinity mask capped by the cgroup CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        # cgroup v2 "<quota> <period>", e.g. "50000 100000" for cpus: '0.5'
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def cpu_chunk(start, stop):
+    """One slice of cpu_intensive_task's loop; runs inside a worker process"""
+    result = 0
+    for i in range(start, stop):
+        result += i ** 2 * random.random()
+        if i % 1000 == 0:
+            # Create some string operations to increase CPU usage
+            temp = hashlib.sha256(str(result).encode()).hexdigest()
+    return result
+
+
+def numpy_chunk(start, stop):
+    """Vectorized cpu_chunk: same sum of i**2 * U(0,1), drawn a block at a time"""
+    rng = np.random.default_rng()
+    result = 0.0
+    for block_start in range(start, stop, NUMPY_BLOCK):
+        i = np.arange(block_start, min(block_start + NUMPY_BLOCK, stop), dtype=np.float64)
+        result += float(np.dot(i * i, rng.random(len(i))))
+        # One digest per block instead of one per 1000 iterations
+        temp = hashlib.sha256(str(result).encode()).hexdigest()
+    return result
+
+
+CHUNK_FUNCTIONS = {'python': cpu_chunk, 'numpy': numpy_chunk}
+
+
+class ComputePool:
+    """Bounded ProcessPoolExecutor front end; workers=0 runs chunks inline"""
+
+    def __init__(self, workers, chunk_size=250000, queue_size=None, timeout=30):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size or max(workers, 1) * 4
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight = 0
+        self._submitted = 0
+        self._rejected = 0
+        self._restarts = 0
+
+    def _get_executor(self):
+        # Created on first use; forkserver children do not inherit the app's
+        # threads, locks or open database connections
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+            return self._executor
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next _get_executor() starts a new one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._restarts += 1
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, fn, *args):
+        """Queue one chunk, blocking up to `timeout` s for a free slot"""
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._rejected += 1
+            raise ComputeBusy(f"compute queue full ({self.queue_size} chunks) for {self.timeout}s")
+        try:
+            executor = self._get_executor()
+            try:
+                future = executor.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died since the last submit: retry once on a new pool
+                self._discard(executor)
+                executor = self._get_executor()
+                future = executor.submit(fn, *args)
+        except BrokenProcessPool as e:
+            self._slots.release()
+            self._discard(executor)
+            raise ComputeBroken(f"compute pool broken: {e}") from e
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._in_flight += 1
+            self._submitted += 1
+        future.add_done_callback(self._release)
+        return future
+
+    def cpu_task(self, iterations, engine='python'):
+        """Run cpu_intensive_task's loop across the pool; returns (result, duration_ms)"""
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {', '.join(ENGINES)}")
+        if engine == 'numpy' and np is None:
+            raise ValueError("engine 'numpy' needs numpy installed")
+        chunk = CHUNK_FUNCTIONS[engine]
+        start_time = time.time()
+        bounds = [(start, min(start + self.chunk_size, iterations))
+                  for start in range(0, iterations, self.chunk_size)]
+        if self.workers == 0:
+            result = sum(chunk(start, stop) for start, stop in bounds)
+        else:
+            futures = [self.submit(chunk, start, stop) for start, stop in bounds]
+            try:
+                result = sum(future.result() for future in futures)
+            except BrokenProcessPool as e:
+                # The next submit replaces the pool
+                raise ComputeBroken(f"compute worker died: {e}") from e
+        return result, (time.time() - start_time) * 1000
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'chunk_size': self.chunk_size,
+                'queue_size': self.queue_size,
+                'in_flight': self._in_flight,
+                'submitted': self._submitted,
+                'rejected': self._rejected,
+                'restarts': self._restarts
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Thread-safe PostgreSQL connection pool with checkout health checks and
+usage metrics, shared by every request handler and background thread.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """No connection became free within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Bounded pool: callers block (up to `timeout` s) when all connections are in use"""
+
+    def __init__(self, dsn, minconn=1, maxconn=10, timeout=10, check_after=30):
+        self.dsn = dsn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        # Connections idle longer than this are pinged before being handed out
+        self.check_after = check_after
+        self._stats_lock = threading.Lock()
+        # Connections inherited across fork(); see _check_fork()
+        self._orphaned = []
+        self._reset()
+
+    def _reset(self):
+        """Start from an empty pool in the current process"""
+        self._pid = os.getpid()
+        # Idle connections, reused most-recently-returned first
+        self._idle = []
+        self._warmed = False
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        self._last_used = {}
+        self._opened = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._discarded = 0
+
+    def _check_fork(self):
+        # A forked worker must never use its parent's sockets. Closing them
+        # would send Terminate on the parent's sessions, so they are only
+        # kept referenced (never garbage collected) and replaced.
+        if self._pid != os.getpid():
+            with self._stats_lock:
+                if self._pid != os.getpid():
+                    self._orphaned.extend(self._idle)
+                    self._reset()
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.dsn)
+        with self._stats_lock:
+            self._opened += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        finally:
+            with self._stats_lock:
+                self._opened -= 1
+                self._last_used.pop(id(conn), None)
+
+    def _warm(self):
+        # Opened on first use so importing the app never needs the database
+        with self._stats_lock:
+            if self._warmed:
+                return
+            self._warmed = True
+        for _ in range(self.minconn - len(self._idle)):
+            conn = self._connect()
+            with self._stats_lock:
+                self._idle.append(conn)
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return
+        start = time.time()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.time() - start
+        with self._stats_lock:
+            self._waits += 1
+            self._wait_time += waited
+            if not acquired:
+                self._timeouts += 1
+        if not acquired:
+            raise PoolTimeout(f"no database connection free after {self.timeout}s")
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.time() - self._last_used.get(id(conn), 0) < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute('SELECT 1')
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self):
+        """Check out a healthy connection; pair every call with putconn()"""
+        self._check_fork()
+        self._acquire_slot()
+        try:
+            self._warm()
+            with self._stats_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is not None and not self._healthy(conn):
+                # Broken (e.g. database restarted), replace it with a fresh one
+                self._close(conn)
+                with self._stats_lock:
+                    self._discarded += 1
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._stats_lock:
+            self._in_use += 1
+            self._checkouts += 1
+        return conn
+
+    def putconn(self, conn):
+        broken = conn.closed != 0
+        if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            # Never hand the next caller a connection mid-transaction
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        try:
+            if broken:
+                self._close(conn)
+            else:
+                with self._stats_lock:
+                    self._last_used[id(conn)] = time.time()
+                    self._idle.append(conn)
+        finally:
+            with self._stats_lock:
+                self._in_use -= 1
+                if broken:
+                    self._discarded += 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """`with pool.connection() as conn:` checkout; uncommitted work is rolled back"""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def close_all(self):
+        """Close idle connections, e.g. in a server master before forking workers"""
+        with self._stats_lock:
+            idle, self._idle = self._idle, []
+            self._warmed = False
+        for conn in idle:
+            self._close(conn)
+
+    def metrics(self):
+        with self._stats_lock:
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'open': self._opened,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_ms': round(self._wait_time * 1000, 2),
+                'timeouts': self._timeouts,
+                'discarded': self._discarded
+            }
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings for Heavy-App: `gunicorn -c gunicorn.conf.py app:app`.
+
+Preforked gthread workers with keep-alive. The app is preloaded in the
+master, so `kill -HUP <master pid>` replaces the workers gracefully but they
+keep the code the master loaded. To deploy code changes without downtime,
+`kill -USR2 <master pid>` starts a new master with the new code alongside,
+then `kill -TERM` the old one (or restart the container). Each worker has
+its own connection pool, compute pool, memory cache and job queue; the
+background scheduler runs in exactly one of them (see app.scheduler_leader).
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '80')}"
+workers = int(os.getenv('WEB_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+# /api/combined-stress can legitimately run for tens of seconds
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+
+# Import the app once in the master; workers fork with it already loaded
+preload_app = True
+
+
+def when_ready(server):
+    # Runs in the master before any worker forks: migrate once, then drop
+    # the master's connections so no worker inherits a socket
+    import app
+    app.init_db()
+    app.db_pool.close_all()
+
+
+def post_worker_init(worker):
+    import app
+    app.start_background_workers()
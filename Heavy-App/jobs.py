@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Background jobs for long-running stress work.
+
+Jobs run on a small bounded thread pool so request threads return at once;
+callers read progress and per-worker results from the Job while it runs.
+With a JobStore, snapshots are also written to Postgres so every server
+worker process can report on jobs started by any other.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed')
+
+
+class JobQueueFull(Exception):
+    """Every worker is busy and the pending queue is at its depth limit"""
+
+
+class Job:
+    """State of one submitted job; every change bumps `version` and wakes waiters"""
+
+    def __init__(self, kind, params):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.status = 'queued'
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = {}
+        self.workers = {}
+        self.result = None
+        self.error = None
+        self.version = 0
+        self.saved_at = 0
+        self.saved_status = None
+        # Called (outside the lock) after every change
+        self.listener = None
+        self._cond = threading.Condition()
+
+    def _changed(self):
+        self.version += 1
+        self._cond.notify_all()
+
+    def _notify(self):
+        if self.listener is not None:
+            self.listener(self)
+
+    def update(self, progress=None, worker_id=None, worker_result=None):
+        """Report overall progress and/or the latest result of one worker"""
+        with self._cond:
+            if progress:
+                self.progress.update(progress)
+            if worker_id is not None:
+                self.workers[str(worker_id)] = worker_result
+            self._changed()
+        self._notify()
+
+    def set_status(self, status, result=None, error=None):
+        with self._cond:
+            self.status = status
+            if status == 'running':
+                self.started = time.time()
+            elif status in ('succeeded', 'failed'):
+                self.finished = time.time()
+                self.result = result
+                self.error = error
+            self._changed()
+        self._notify()
+
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'failed')
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'id': self.id,
+                'type': self.kind,
+                'params': self.params,
+                'status': self.status,
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished,
+                'progress': dict(self.progress),
+                'workers': dict(self.workers),
+                'result': self.result,
+                'error': self.error,
+                'version': self.version
+            }
+
+    def wait(self, version, timeout):
+        """Block until the job changes past `version` (or `timeout` s pass)"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.version != version, timeout=timeout)
+            return self.version
+
+
+class JobStore:
+    """Job snapshots in the `jobs` table, shared by all server processes"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def save(self, snapshot):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    INSERT INTO jobs (id, type, status, snapshot) VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (id) DO UPDATE SET
+                        status = EXCLUDED.status,
+                        snapshot = EXCLUDED.snapshot,
+                        updated_at = CURRENT_TIMESTAMP
+                    -- Concurrent progress writes may land out of order
+                    WHERE (jobs.snapshot->>'version')::int < (EXCLUDED.snapshot->>'version')::int
+                ''', (snapshot['id'], snapshot['type'], snapshot['status'], json.dumps(snapshot)))
+            conn.commit()
+
+    def load(self, job_id):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('SELECT snapshot FROM jobs WHERE id = %s', (job_id,))
+                row = cur.fetchone()
+        return row[0] if row else None
+
+    def recent(self, limit=100):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    SELECT id, type, status FROM jobs ORDER BY created_at DESC LIMIT %s
+                ''', (limit,))
+                return [{'id': i, 'type': t, 'status': s} for i, t, s in cur.fetchall()]
+
+    def purge(self, max_age_hours):
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    DELETE FROM jobs WHERE updated_at < LOCALTIMESTAMP - %s * INTERVAL '1 hour'
+                ''', (max_age_hours,))
+            conn.commit()
+
+
+class JobManager:
+    """Runs at most `workers` jobs at once with up to `max_pending` waiting"""
+
+    def __init__(self, workers=2, max_pending=4, keep=100, store=None, save_interval=1):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep = keep
+        self.store = store
+        # Progress is written at most this often; status changes always are
+        self.save_interval = save_interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._active = 0
+        self._rejected = 0
+
+    def submit(self, kind, fn, params):
+        """Queue fn(job, **params); raises JobQueueFull instead of growing the backlog"""
+        with self._lock:
+            if self._active >= self.workers + self.max_pending:
+                self._rejected += 1
+                raise JobQueueFull(f"{self._active} jobs already queued or running")
+            job = Job(kind, params)
+            if self.store is not None:
+                job.listener = self._save
+            self._jobs[job.id] = job
+            self._active += 1
+            self._prune()
+        if self.store is not None:
+            self._save(job)
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def _save(self, job):
+        now = time.time()
+        if job.status == job.saved_status and now - job.saved_at < self.save_interval:
+            return
+        job.saved_at = now
+        job.saved_status = job.status
+        try:
+            self.store.save(job.snapshot())
+        except Exception as e:
+            print(f"Job store error for {job.id}: {e}")
+
+    def _run(self, job, fn):
+        job.set_status('running')
+        try:
+            job.set_status('succeeded', result=fn(job, **job.params))
+        except Exception as e:
+            job.set_status('failed', error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _prune(self):
+        # Forget the oldest finished jobs beyond `keep`
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def metrics(self):
+        with self._lock:
+            counts = {status: 0 for status in JOB_STATUSES}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'active': self._active,
+                'rejected': self._rejected,
+                **counts
+            }
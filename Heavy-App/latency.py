@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Fixed-bucket latency histograms.
+
+Each histogram is a constant-size list of counters, so recording costs the
+same after a million samples as after one; per-thread histograms are merged
+once the threads finish instead of sharing a lock while they run.
+"""
+from bisect import bisect_left
+
+# Bucket upper bounds in ms: 0.05 ms growing 20% per bucket, up to ~2.5 min
+BUCKET_BOUNDS = [0.05 * 1.2 ** i for i in range(83)]
+
+
+class LatencyHistogram:
+    """Count/total/min/max plus bucketed durations for one operation type"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        # One extra bucket for anything above the last bound
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def record(self, duration_ms):
+        self.count += 1
+        self.total += duration_ms
+        if self.min is None or duration_ms < self.min:
+            self.min = duration_ms
+        if self.max is None or duration_ms > self.max:
+            self.max = duration_ms
+        self.buckets[bisect_left(BUCKET_BOUNDS, duration_ms)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+        return self
+
+    def percentile(self, p):
+        """p-th percentile, interpolated inside its bucket (error under 20%)"""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            if n and seen + n >= rank:
+                lower = max(BUCKET_BOUNDS[i - 1] if i else 0, self.min)
+                upper = min(BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else None,
+            'min_ms': round(self.min, 3) if self.min is not None else None,
+            'max_ms': round(self.max, 3) if self.max is not None else None,
+            'p50_ms': _round(self.percentile(50)),
+            'p95_ms': _round(self.percentile(95)),
+            'p99_ms': _round(self.percentile(99))
+        }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def merge_all(per_thread):
+    """Merge [{op_type: LatencyHistogram}] from several threads into one dict"""
+    merged = {}
+    for histograms in per_thread:
+        for op_type, histogram in histograms.items():
+            merged.setdefault(op_type, LatencyHistogram()).merge(histogram)
+    return merged
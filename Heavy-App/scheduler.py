@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Periodic task scheduler for the app's background load.
+
+One dispatcher thread hands due tasks to a small thread pool. Each task has
+its own interval, a random start phase and per-run jitter so tasks never
+fall into lockstep, and exponential backoff while it keeps failing. A task
+never overlaps itself; run time and start lag are tracked per task.
+"""
+import heapq
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    def __init__(self, name, fn, interval, jitter, backoff_max):
+        self.name = name
+        self.fn = fn
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff_max = backoff_max
+        self.due = None
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.total_run = 0.0
+        self.max_run = 0.0
+        self.last_run = None
+        self.last_lag = None
+        self.max_lag = 0.0
+        self.last_error = None
+
+    def next_delay(self):
+        """Interval with ±jitter, doubled per consecutive failure up to backoff_max.
+
+        The cap only limits the backoff: a task whose interval is longer than
+        backoff_max keeps its own interval rather than retrying sooner.
+        """
+        delay = self.interval
+        if self.consecutive_failures:
+            backoff = self.interval * 2 ** min(self.consecutive_failures, 32)
+            delay = max(self.interval, min(backoff, self.backoff_max))
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def metrics(self, now):
+        return {
+            'interval_s': self.interval,
+            'running': self.running,
+            'runs': self.runs,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'last_run_ms': _ms(self.last_run),
+            'avg_run_ms': _ms(self.total_run / self.runs) if self.runs else None,
+            'max_run_ms': _ms(self.max_run),
+            'last_lag_ms': _ms(self.last_lag),
+            'max_lag_ms': _ms(self.max_lag),
+            'next_run_in_s': round(self.due - now, 2) if self.due is not None else None,
+            'last_error': self.last_error
+        }
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+class Scheduler:
+    """Runs registered tasks on at most `max_concurrency` threads"""
+
+    def __init__(self, max_concurrency=2, jitter=0.2, backoff_max=60):
+        self.max_concurrency = max_concurrency
+        self.jitter = jitter
+        self.backoff_max = backoff_max
+        self.tasks = {}
+        self._heap = []
+        self._cond = threading.Condition()
+        self._executor = None
+        self._thread = None
+        self._stopped = False
+
+    def add(self, name, fn, interval, jitter=None, backoff_max=None):
+        """Register fn() to run about every `interval` seconds"""
+        task = Task(name, fn, interval,
+                    self.jitter if jitter is None else jitter,
+                    self.backoff_max if backoff_max is None else backoff_max)
+        with self._cond:
+            self.tasks[name] = task
+            if self._thread is not None:
+                self._schedule(task, time.time() + random.uniform(0, interval))
+        return task
+
+    def _schedule(self, task, due):
+        task.due = due
+        heapq.heappush(self._heap, (due, task.name))
+        self._cond.notify()
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None:
+                return self
+            self._stopped = False
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                thread_name_prefix='scheduler')
+            now = time.time()
+            for task in self.tasks.values():
+                # Random first phase so tasks with equal intervals spread out
+                self._schedule(task, now + random.uniform(0, task.interval))
+            self._thread = threading.Thread(target=self._dispatch, name='scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop dispatching; runs in progress finish but are not rescheduled"""
+        with self._cond:
+            self._stopped = True
+            self._heap = []
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if thread is not None:
+            thread.join()
+
+    def _dispatch(self):
+        with self._cond:
+            executor = self._executor
+            while not self._stopped:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                due, name = self._heap[0]
+                wait = due - time.time()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+                heapq.heappop(self._heap)
+                task = self.tasks.get(name)
+                if task is None or task.due != due:
+                    continue
+                task.running = True
+                executor.submit(self._run, task, due)
+
+    def _run(self, task, due):
+        started = time.time()
+        error = None
+        try:
+            task.fn()
+        except Exception as e:
+            error = e
+            print(f"Scheduled task {task.name} error: {e}")
+        finished = time.time()
+        with self._cond:
+            task.running = False
+            task.runs += 1
+            task.last_run = finished - started
+            task.total_run += task.last_run
+            task.max_run = max(task.max_run, task.last_run)
+            # Lag: how late the run started, e.g. waiting for a free thread
+            task.last_lag = max(started - due, 0)
+            task.max_lag = max(task.max_lag, task.last_lag)
+            if error is None:
+                task.consecutive_failures = 0
+            else:
+                task.failures += 1
+                task.consecutive_failures += 1
+                task.last_error = str(error)
+            if self._thread is not None and not self._stopped:
+                # Next run counts from the previous due time so the average
+                # rate holds, but never schedules into the past
+                self._schedule(task, max(due + task.next_delay(), finished))
+
+    def metrics(self):
+        with self._cond:
+            now = time.time()
+            return {
+                'max_concurrency': self.max_concurrency,
+                'running': self._thread is not None and self._thread.is_alive(),
+                'tasks': {name: task.metrics(now) for name, task in self.tasks.items()}
+            }
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations for the Heavy-App database.
+
+Each migration runs once and is recorded in `schema_migrations`. An
+advisory lock serialises concurrent app processes starting together.
+"""
+import re
+import time
+from datetime import datetime, timedelta
+
+# Arbitrary keys for pg_advisory_lock, shared by every app process
+MIGRATION_LOCK_KEY = 724310
+PARTITION_LOCK_KEY = 724311
+ROLLUP_LOCK_KEY = 724312
+# Held for life by the one process that runs the background scheduler
+SCHEDULER_LOCK_KEY = 724313
+
+# (version, name, statements, transactional). Non-transactional migrations
+# run in autocommit mode, which CREATE INDEX CONCURRENTLY requires.
+MIGRATIONS = [
+    (1, 'performance_data_metric_name_timestamp_idx', [
+        # varchar_pattern_ops lets the index serve `metric_name LIKE 'prefix%'`
+        # as well as equality, whatever the database collation is
+        '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS performance_data_metric_name_timestamp_idx
+            ON performance_data (metric_name varchar_pattern_ops, timestamp)
+        ''',
+    ], False),
+    (2, 'performance_data_timestamp_brin', [
+        # Rows arrive in timestamp order, so a BRIN index stays tiny and
+        # prunes everything outside a recent time window
+        '''
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS performance_data_timestamp_brin
+            ON performance_data USING BRIN (timestamp) WITH (pages_per_range = 32)
+        ''',
+        'ANALYZE performance_data',
+    ], False),
+    (3, 'partition_performance_data_by_day', [
+        # The existing table becomes the first partition, covering everything
+        # up to tomorrow; daily partitions are added by ensure_partitions()
+        '''
+        DO $$
+        DECLARE
+            boundary TIMESTAMP := date_trunc('day', now()) + INTERVAL '1 day';
+        BEGIN
+            IF (SELECT relkind FROM pg_class WHERE oid = 'performance_data'::regclass) = 'p' THEN
+                RETURN;
+            END IF;
+            ALTER TABLE performance_data RENAME TO performance_data_legacy;
+            ALTER INDEX IF EXISTS performance_data_metric_name_timestamp_idx
+                RENAME TO performance_data_legacy_metric_name_timestamp_idx;
+            ALTER INDEX IF EXISTS performance_data_timestamp_brin
+                RENAME TO performance_data_legacy_timestamp_brin;
+            DELETE FROM performance_data_legacy WHERE timestamp IS NULL;
+            ALTER TABLE performance_data_legacy ALTER COLUMN timestamp SET NOT NULL;
+            -- Partition keys must be part of the primary key
+            ALTER TABLE performance_data_legacy DROP CONSTRAINT performance_data_pkey;
+            ALTER TABLE performance_data_legacy ADD PRIMARY KEY (id, timestamp);
+
+            CREATE TABLE performance_data (
+                id INTEGER NOT NULL DEFAULT nextval('performance_data_id_seq'),
+                timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                metric_name VARCHAR(50),
+                metric_value FLOAT,
+                metadata JSONB,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp);
+            -- Keep the id sequence alive when the legacy partition is dropped
+            ALTER SEQUENCE performance_data_id_seq OWNED BY performance_data.id;
+            CREATE INDEX performance_data_metric_name_timestamp_idx
+                ON performance_data (metric_name varchar_pattern_ops, timestamp);
+            CREATE INDEX performance_data_timestamp_brin
+                ON performance_data USING BRIN (timestamp) WITH (pages_per_range = 32);
+            EXECUTE format(
+                'ALTER TABLE performance_data ATTACH PARTITION performance_data_legacy '
+                'FOR VALUES FROM (MINVALUE) TO (%L)', boundary);
+        END $$
+        ''',
+    ], True),
+    (4, 'performance_rollup_1m', [
+        '''
+        CREATE TABLE IF NOT EXISTS performance_rollup_1m (
+            bucket TIMESTAMP NOT NULL,
+            metric_name VARCHAR(50) NOT NULL,
+            sample_count BIGINT NOT NULL,
+            sum_value FLOAT,
+            min_value FLOAT,
+            max_value FLOAT,
+            PRIMARY KEY (bucket, metric_name)
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS rollup_state (
+            name VARCHAR(50) PRIMARY KEY,
+            watermark TIMESTAMP NOT NULL
+        )
+        ''',
+    ], True),
+    (5, 'jobs', [
+        # Job snapshots, so any app worker process can answer for any job
+        '''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id VARCHAR(32) PRIMARY KEY,
+            type VARCHAR(50) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            snapshot JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        'CREATE INDEX IF NOT EXISTS jobs_updated_at_idx ON jobs (updated_at)',
+    ], True),
+]
+
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        cur.execute('SELECT version FROM schema_migrations')
+        return {row[0] for row in cur.fetchall()}
+
+
+def migrate(conn):
+    """Apply pending migrations in order; returns the versions applied"""
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(100),
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    duration_ms FLOAT
+                )
+            ''')
+            cur.execute('SELECT pg_advisory_lock(%s)', (MIGRATION_LOCK_KEY,))
+        try:
+            done = applied_versions(conn)
+            for version, name, statements, transactional in MIGRATIONS:
+                if version in done:
+                    continue
+                start_time = time.time()
+                conn.autocommit = not transactional
+                with conn.cursor() as cur:
+                    for statement in statements:
+                        cur.execute(statement)
+                    cur.execute('''
+                        INSERT INTO schema_migrations (version, name, duration_ms)
+                        VALUES (%s, %s, %s)
+                    ''', (version, name, (time.time() - start_time) * 1000))
+                if transactional:
+                    conn.commit()
+                conn.autocommit = True
+                applied.append(version)
+                print(f"Applied migration {version}: {name}")
+        finally:
+            if not conn.autocommit:
+                # A transactional migration failed part way
+                conn.rollback()
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+    finally:
+        conn.autocommit = autocommit
+    return applied
+
+
+def plan_summary(plan):
+    """Flatten an EXPLAIN (FORMAT JSON) plan into node types and index names"""
+    nodes, indexes = [], []
+
+    def walk(node):
+        nodes.append(node['Node Type'])
+        if 'Index Name' in node:
+            indexes.append(node['Index Name'])
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan['Plan'])
+    return {
+        'nodes': nodes,
+        'indexes': indexes,
+        'uses_index': bool(indexes),
+        'seq_scan': 'Seq Scan' in nodes,
+        'total_cost': plan['Plan'].get('Total Cost'),
+        'execution_ms': plan.get('Execution Time')
+    }
+
+
+PARTITION_PREFIX = 'performance_data_p'
+_BOUND_RE = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound(value):
+    value = value.strip()
+    if value in ('MINVALUE', 'MAXVALUE'):
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(conn):
+    """Return [(name, lower, upper)] for performance_data; None marks MIN/MAXVALUE"""
+    with conn.cursor() as cur:
+        cur.execute('''
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'performance_data'::regclass
+        ''')
+        rows = cur.fetchall()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or '')
+        if match:
+            partitions.append((name, _parse_bound(match.group(1)), _parse_bound(match.group(2))))
+    return sorted(partitions, key=lambda p: p[2] or datetime.max)
+
+
+def ensure_partitions(conn, days_ahead=3):
+    """Create daily partitions from today through `days_ahead` days out"""
+    with conn.cursor() as cur:
+        cur.execute('SELECT pg_advisory_xact_lock(%s)', (PARTITION_LOCK_KEY,))
+    existing = list_partitions(conn)
+    # Start after the newest existing range so days never overlap
+    covered = max((upper for _, _, upper in existing if upper), default=None)
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    if covered and covered > day:
+        day = covered
+    last = datetime.now() + timedelta(days=days_ahead)
+    created = []
+    with conn.cursor() as cur:
+        while day <= last:
+            name = f"{PARTITION_PREFIX}{day:%Y%m%d}"
+            cur.execute(f'''
+                CREATE TABLE IF NOT EXISTS {name} PARTITION OF performance_data
+                FOR VALUES FROM (%s) TO (%s)
+            ''', (day, day + timedelta(days=1)))
+            created.append(name)
+            day += timedelta(days=1)
+    conn.commit()
+    return created
+
+
+def drop_expired_partitions(conn, retention_days):
+    """Drop partitions whose whole range is older than the retention window.
+
+    Each one is detached CONCURRENTLY first, which only takes a SHARE UPDATE
+    EXCLUSIVE lock on performance_data, so inserts and the rollup keep
+    running; dropping the attached partition would lock the parent ACCESS
+    EXCLUSIVE. DETACH ... CONCURRENTLY cannot run inside a transaction, so
+    this runs in autocommit mode under a session-level advisory lock.
+    """
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    dropped = []
+    autocommit = conn.autocommit
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute('SELECT pg_advisory_lock(%s)', (PARTITION_LOCK_KEY,))
+            try:
+                # A detach interrupted part way must be finalized, not restarted
+                cur.execute('''
+                    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = 'performance_data'::regclass AND i.inhdetachpending
+                ''')
+                pending = {row[0] for row in cur.fetchall()}
+                for name, _, upper in list_partitions(conn):
+                    if upper is not None and upper <= cutoff:
+                        mode = 'FINALIZE' if name in pending else 'CONCURRENTLY'
+                        cur.execute(f'ALTER TABLE performance_data DETACH PARTITION {name} {mode}')
+                        cur.execute(f'DROP TABLE IF EXISTS {name}')
+                        dropped.append(name)
+                cur.execute('DELETE FROM performance_rollup_1m WHERE bucket < %s', (cutoff,))
+            finally:
+                cur.execute('SELECT pg_advisory_unlock(%s)', (PARTITION_LOCK_KEY,))
+    finally:
+        conn.autocommit = autocommit
+    return dropped
+
+
+def refresh_rollup(conn, lag_minutes=2):
+    """Fold complete minutes of raw rows into performance_rollup_1m.
+
+    Buckets from `lag_minutes` before the watermark are recomputed so rows
+    committed late by long transactions are still counted. Returns None
+    when another process is already refreshing.
+    """
+    with conn.cursor() as cur:
+        cur.execute('SELECT pg_try_advisory_xact_lock(%s)', (ROLLUP_LOCK_KEY,))
+        if not cur.fetchone()[0]:
+            conn.rollback()
+            return None
+        cur.execute("SELECT watermark FROM rollup_state WHERE name = 'performance_1m'")
+        row = cur.fetchone()
+        cur.execute("SELECT date_trunc('minute', LOCALTIMESTAMP)")
+        upto = cur.fetchone()[0]
+        if row is None:
+            cur.execute('SELECT MIN(timestamp) FROM performance_data')
+            start = cur.fetchone()[0] or upto
+            start = start.replace(second=0, microsecond=0)
+        else:
+            start = row[0] - timedelta(minutes=lag_minutes)
+        cur.execute('''
+            INSERT INTO performance_rollup_1m
+                (bucket, metric_name, sample_count, sum_value, min_value, max_value)
+            SELECT date_trunc('minute', timestamp), metric_name, COUNT(*),
+                   SUM(metric_value), MIN(metric_value), MAX(metric_value)
+            FROM performance_data
+            WHERE timestamp >= %s AND timestamp < %s AND metric_name IS NOT NULL
+            GROUP BY 1, 2
+            ON CONFLICT (bucket, metric_name) DO UPDATE SET
+                sample_count = EXCLUDED.sample_count,
+                sum_value = EXCLUDED.sum_value,
+                min_value = EXCLUDED.min_value,
+                max_value = EXCLUDED.max_value
+        ''', (start, upto))
+        rows = cur.rowcount
+        cur.execute('''
+            INSERT INTO rollup_state (name, watermark) VALUES ('performance_1m', %s)
+            ON CONFLICT (name) DO UPDATE SET watermark = EXCLUDED.watermark
+        ''', (upto,))
+    conn.commit()
+    return rows
+
+
+def estimate_row_count(conn):
+    """Approximate performance_data row count from the statistics collector.
+
+    Sums n_live_tup over the partitions, so it costs the same at any table
+    size; it trails real writes by the stats flush interval (about a second).
+    """
+    with conn.cursor() as cur:
+        cur.execute('''
+            SELECT COALESCE(SUM(s.n_live_tup), 0)
+            FROM pg_inherits i JOIN pg_stat_user_tables s ON s.relid = i.inhrelid
+            WHERE i.inhparent = 'performance_data'::regclass
+        ''')
+        count = cur.fetchone()[0]
+    conn.rollback()
+    return int(count)
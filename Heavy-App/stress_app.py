@@ -1,71 +1,55 @@
 #!/usr/bin/env python3
+"""
+Stress generator for Heavy-App: its stress levels and endpoints. The
+engines, reports, scenarios, coordination and benchmark mode are the
+shared driver in ../stress/driver.py.
+"""
 import os
-import time
 import random
-import requests
-import threading
-from concurrent.futures import ThreadPoolExecutor
+import sys
 
-TARGET_URL = os.getenv('TARGET_URL', 'http://web-app')
-STRESS_LEVEL = os.getenv('STRESS_LEVEL', 'low')
+# The load-generation modules are shared with the nginx generator in
+# ../stress; the image copies them next to this file instead
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'stress'))
+
+import driver
 
 # Stress level configurations
 STRESS_CONFIGS = {
-    'low': {'threads': 5, 'requests_per_thread': 10, 'delay': 0.5},
-    'medium': {'threads': 20, 'requests_per_thread': 100, 'delay': 0.1},
-    'high': {'threads': 50, 'requests_per_thread': 200, 'delay': 0.05},
-    'extreme': {'threads': 100, 'requests_per_thread': 5000, 'delay': 0.001},
-    'cpu-intensive': {'threads': 10, 'requests_per_thread': 50, 'delay': 0.1, 'cpu_focus': True},
-    'memory-intensive': {'threads': 10, 'requests_per_thread': 50, 'delay': 0.1, 'memory_focus': True}
+    'low': {'threads': 5, 'requests_per_thread': 10, 'delay': 0.5, 'rate': 5},
+    'medium': {'threads': 20, 'requests_per_thread': 100, 'delay': 0.1, 'rate': 50},
+    'high': {'threads': 50, 'requests_per_thread': 200, 'delay': 0.05, 'rate': 200},
+    'extreme': {'threads': 100, 'requests_per_thread': 5000, 'delay': 0.001, 'rate': 1000},
+    'cpu-intensive': {'threads': 10, 'requests_per_thread': 50, 'delay': 0.1, 'rate': 10, 'cpu_focus': True},
+    'memory-intensive': {'threads': 10, 'requests_per_thread': 50, 'delay': 0.1, 'rate': 10, 'memory_focus': True},
+    # The default mix without /api/combined-stress, whose 5 s requests would
+    # hold p99 above any sub-5 s SLO; use it with MODE=benchmark
+    'benchmark': {'threads': 20, 'requests_per_thread': 100, 'delay': 0.1, 'rate': 50, 'short_requests': True}
 }
 
-def generate_load(thread_id, config):
-    """Generate load on the target application"""
-    for i in range(config['requests_per_thread']):
-        try:
-            # Choose endpoint based on stress configuration
-            if config.get('cpu_focus'):
-                endpoints = ['/api/cpu-intensive?iterations=500000']
-            elif config.get('memory_focus'):
-                endpoints = ['/api/memory-intensive?size_mb=20']
-            else:
-                endpoints = [
-                    '/',
-                    '/api/stats',
-                    '/health',
-                    '/api/cpu-intensive?iterations=100000',
-                    '/api/memory-intensive?size_mb=5',
-                    '/api/database-intensive?operations=50',
-                    '/api/combined-stress?duration=5'
-                ]
-            
-            endpoint = random.choice(endpoints)
-            
-            response = requests.get(f"{TARGET_URL}{endpoint}", timeout=30)
-            print(f"Thread {thread_id}: Request {i+1} to {endpoint} - Status: {response.status_code}")
-            
-            time.sleep(config['delay'])
-        except Exception as e:
-            print(f"Thread {thread_id}: Error - {str(e)}")
+def endpoints_for(config):
+    """Endpoints to choose from based on stress configuration"""
+    if config.get('cpu_focus'):
+        return ['/api/cpu-intensive?iterations=500000']
+    if config.get('memory_focus'):
+        return ['/api/memory-intensive?size_mb=20']
+    endpoints = [
+        '/',
+        '/api/stats',
+        '/health',
+        '/api/cpu-intensive?iterations=100000',
+        '/api/memory-intensive?size_mb=5',
+        '/api/database-intensive?operations=50'
+    ]
+    if not config.get('short_requests'):
+        endpoints.append('/api/combined-stress?duration=5')
+    return endpoints
 
-def main():
-    config = STRESS_CONFIGS.get(STRESS_LEVEL, STRESS_CONFIGS['low'])
-    print(f"Starting stress test - Level: {STRESS_LEVEL}")
-    print(f"Configuration: {config}")
-    
-    while True:
-        with ThreadPoolExecutor(max_workers=config['threads']) as executor:
-            futures = []
-            for i in range(config['threads']):
-                future = executor.submit(generate_load, i, config)
-                futures.append(future)
-            
-            # Wait for all threads to complete
-            for future in futures:
-                future.result()
-        
-        print(f"Completed cycle. Waiting 10 seconds before next cycle...")
-        time.sleep(10)
+def choose_endpoint(config):
+    """(report name, path) of a random endpoint for this level"""
+    endpoint = random.choice(endpoints_for(config))
+    return endpoint, endpoint
 
 if __name__ == "__main__":
-    main()
+    # Heavy endpoints such as /api/combined-stress run for seconds
+    driver.main(STRESS_CONFIGS, choose_endpoint, request_timeout=30, script=__file__)
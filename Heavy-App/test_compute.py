@@ -0,0 +1,45 @@
+import os
+import signal
+import time
+
+import pytest
+from concurrent.futures.process import BrokenProcessPool
+
+from compute import ComputeBroken, ComputePool, cpu_chunk
+
+
+def test_pool_recovers_after_worker_dies():
+    pool = ComputePool(workers=1, chunk_size=1000)
+    try:
+        assert pool.submit(cpu_chunk, 0, 10).result(timeout=30) >= 0
+        # Kill the worker mid-task, as the OOM killer would
+        future = pool.submit(time.sleep, 30)
+        while not pool._executor._processes:
+            time.sleep(0.05)
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        with pytest.raises(BrokenProcessPool):
+            future.result(timeout=30)
+
+        assert pool.submit(cpu_chunk, 0, 10).result(timeout=30) >= 0
+        assert pool.cpu_task(5000)[0] >= 0
+        assert pool.metrics()['restarts'] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_cpu_task_reports_broken_pool_as_compute_broken():
+    pool = ComputePool(workers=1, chunk_size=1000)
+    try:
+        pool.submit(cpu_chunk, 0, 10).result(timeout=30)
+        for pid in list(pool._executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        # Either submit finds the pool broken and rebuilds it, or the chunk
+        # fails with it; both must be a handled ComputeBusy, never a raw error
+        try:
+            pool.cpu_task(5000)
+        except ComputeBroken:
+            pass
+        assert pool.cpu_task(5000)[0] >= 0
+    finally:
+        pool.shutdown()
@@ -0,0 +1,21 @@
+from scheduler import Task
+
+
+def make_task(interval, backoff_max, failures):
+    task = Task('task', lambda: None, interval, jitter=0, backoff_max=backoff_max)
+    task.consecutive_failures = failures
+    return task
+
+
+def test_backoff_doubles_up_to_cap():
+    assert make_task(10, 60, 0).next_delay() == 10
+    assert make_task(10, 60, 1).next_delay() == 20
+    assert make_task(10, 60, 2).next_delay() == 40
+    assert make_task(10, 60, 3).next_delay() == 60
+    assert make_task(10, 60, 1000).next_delay() == 60
+
+
+def test_failure_never_shortens_long_interval():
+    # An hourly task must not start retrying every backoff_max seconds
+    assert make_task(3600, 60, 1).next_delay() == 3600
+    assert make_task(3600, 60, 5).next_delay() == 3600
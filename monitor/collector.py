@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Container monitoring collector.
+
+In-process replacement for the monitor_container.sh loop: samples Docker
+stats and application health for every target concurrently, appends the
+metrics CSV, checks thresholds and writes alerts without forking.
+
+Usage: collector.py [monitor|report|continuous|live]
+"""
+import argparse
+import http.client
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from docker_stats import DockerAPIError, StatsCollector, docker_get, empty_stats, parse_stats
+from tailer import tail_lines
+from targets import MULTI_CONTAINER, LOG_DIR, is_app_target, metrics_file_for, resolve_targets
+
+LOG_FILE = os.path.join(LOG_DIR, 'container_monitor.log')
+ALERT_LOG = os.path.join(LOG_DIR, 'container_alerts.log')
+METRICS_HEADER = 'timestamp,cpu_percent,memory_usage_mb,memory_percent,response_time_ms,status'
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def env_float(name, default):
+    # docker-compose passes list-style values like CPU_THRESHOLD="40" with the quotes
+    value = os.getenv(name, '').strip().strip('"\'')
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+# Thresholds
+CPU_THRESHOLD = env_float('CPU_THRESHOLD', 40)            # % of allocated CPU
+MEMORY_THRESHOLD = env_float('MEMORY_THRESHOLD', 80)      # % of allocated memory
+RESPONSE_TIME_THRESHOLD = env_float('RESPONSE_TIME_THRESHOLD', 1000)  # ms
+
+MAX_PARALLEL = int(os.getenv('MAX_PARALLEL', 16))
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', 80))
+HEALTH_PATH = os.getenv('HEALTH_PATH', '/health')
+HEALTH_TIMEOUT = float(os.getenv('HEALTH_TIMEOUT', 5))
+LIVE_INTERVAL = float(os.getenv('LIVE_INTERVAL', 2))
+CONTINUOUS_INTERVAL = float(os.getenv('CONTINUOUS_INTERVAL', 60))
+
+_log_lock = threading.Lock()
+
+
+def now():
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def _append(path, line):
+    with _log_lock:
+        with open(path, 'a') as f:
+            f.write(line + '\n')
+
+
+def log_message(level, message, echo=True):
+    line = f"[{now()}] [{level}] {message}"
+    _append(LOG_FILE, line)
+    if echo:
+        print(line, flush=True)
+
+
+def send_alert(alert_type, message, echo=True):
+    line = f"[{now()}] ALERT: {alert_type} - {message}"
+    _append(ALERT_LOG, line)
+    if echo:
+        print(line, flush=True)
+
+
+def initialize_metrics_file(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        with open(path, 'w') as f:
+            f.write(METRICS_HEADER + '\n')
+
+
+def initialize_logs(names):
+    for path in (LOG_FILE, ALERT_LOG):
+        open(path, 'a').close()
+    for name in names:
+        initialize_metrics_file(metrics_file_for(name))
+
+
+def container_state(name):
+    """Return ('running'|'stopped'|'missing', Docker healthcheck status or None)"""
+    try:
+        info = docker_get(f'/containers/{name}/json')
+    except DockerAPIError as e:
+        if e.status == 404:
+            return 'missing', None
+        raise
+    state = info.get('State', {})
+    health = (state.get('Health') or {}).get('Status')
+    return 'running' if state.get('Running') else 'stopped', health
+
+
+def fetch_stats_once(name):
+    """One stats sample; the daemon waits for a second reading to compute CPU"""
+    return parse_stats(docker_get(f'/containers/{name}/stats?stream=false', timeout=10))
+
+
+def check_app_health(name):
+    """Return (response time ms, 'healthy'|'unhealthy') for the app's health endpoint"""
+    start = time.time()
+    status = 'unhealthy'
+    conn = http.client.HTTPConnection(name, HEALTH_PORT, timeout=HEALTH_TIMEOUT)
+    try:
+        conn.request('GET', HEALTH_PATH)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 200:
+            status = 'healthy'
+    except (OSError, http.client.HTTPException):
+        pass
+    finally:
+        conn.close()
+    return int((time.time() - start) * 1000), status
+
+
+class Collector:
+    """Samples every target concurrently and records metrics and alerts"""
+
+    def __init__(self, names, stats_source=None, max_parallel=MAX_PARALLEL, echo=True):
+        self.names = list(names)
+        # A StatsCollector for long-running modes, else one-shot API reads
+        self.stats_source = stats_source
+        self.echo = echo
+        self.pool = ThreadPoolExecutor(max_workers=max_parallel)
+        # Separate pool so a sample never waits on a slot held by another sample
+        self.stats_pool = ThreadPoolExecutor(max_workers=max_parallel)
+
+    def set_targets(self, names):
+        self.names = list(names)
+        if self.stats_source is not None:
+            self.stats_source.set_containers(self.names)
+
+    def get_stats(self, name):
+        if self.stats_source is not None:
+            return self.stats_source.get(name)
+        return fetch_stats_once(name)
+
+    def sample(self, name):
+        """Collect, log and threshold-check one container; returns the sample dict"""
+        prefix = f"[{name}] " if MULTI_CONTAINER else ''
+        try:
+            state, docker_health = container_state(name)
+        except Exception as e:
+            log_message('ERROR', f"{prefix}Docker API error: {e}", self.echo)
+            return {'name': name, 'state': 'error'}
+        if state == 'missing':
+            log_message('ERROR', f"Container {name} not found", self.echo)
+            return {'name': name, 'state': state}
+        if state != 'running':
+            send_alert('Container Down', f"Container {name} is not running", self.echo)
+            return {'name': name, 'state': state}
+
+        app = is_app_target(name)
+        # Health probe runs while the stats read is in flight
+        stats_future = self.stats_pool.submit(self.get_stats, name)
+        if app:
+            response_time, app_status = check_app_health(name)
+        else:
+            # Not an HTTP app: go by its own healthcheck ('starting' or none is unknown)
+            response_time = None
+            app_status = docker_health if docker_health in ('healthy', 'unhealthy') else 'unknown'
+        try:
+            stats = stats_future.result()
+        except Exception as e:
+            log_message('ERROR', f"{prefix}Error getting stats: {e}", self.echo)
+            stats = empty_stats()
+
+        cpu = stats['cpu']
+        mem_used = stats['memory_used']
+        mem_percent = stats['memory_percent']
+        metrics_file = metrics_file_for(name)
+        initialize_metrics_file(metrics_file)
+        response_field = '' if response_time is None else response_time
+        _append(metrics_file, f"{now()},{cpu},{mem_used},{mem_percent},{response_field},{app_status}")
+
+        response_text = f"Response Time: {response_time}ms, " if app else ''
+        log_message('INFO', f"{prefix}CPU: {cpu}%, Memory: {mem_used}MB ({mem_percent}%), "
+                            f"{response_text}Status: {app_status}", self.echo)
+
+        # Check thresholds and send alerts
+        alerts = []
+        if app:
+            if cpu > CPU_THRESHOLD:
+                alerts.append(('High CPU', f"{prefix}CPU usage is {cpu}% (threshold: {CPU_THRESHOLD:g}%)"))
+            if mem_percent > MEMORY_THRESHOLD:
+                alerts.append(('High Memory', f"{prefix}Memory usage is {mem_percent}% (threshold: {MEMORY_THRESHOLD:g}%)"))
+            if response_time > RESPONSE_TIME_THRESHOLD:
+                alerts.append(('Slow Response', f"{prefix}Response time is {response_time}ms (threshold: {RESPONSE_TIME_THRESHOLD:g}ms)"))
+            if app_status != 'healthy':
+                alerts.append(('Application Unhealthy', f"{prefix}Application health check failed"))
+        elif app_status == 'unhealthy':
+            alerts.append(('Container Unhealthy', f"{prefix}Docker healthcheck reports unhealthy"))
+        for alert_type, message in alerts:
+            send_alert(alert_type, message, self.echo)
+
+        return {
+            'name': name,
+            'state': state,
+            'cpu': cpu,
+            'memory_used': mem_used,
+            'memory_percent': mem_percent,
+            'response_time': response_time,
+            'app_status': app_status,
+            'alerts': alerts
+        }
+
+    def run_cycle(self):
+        """Sample all targets at once; wall time is that of the slowest one"""
+        return list(self.pool.map(self.sample, self.names))
+
+
+def generate_report(names):
+    report_file = os.path.join(LOG_DIR, f"container_report_{datetime.now():%Y%m%d_%H%M%S}.txt")
+    lines = [
+        'Container Monitoring Report',
+        '==========================',
+        f"Generated: {datetime.now():%a %b %d %H:%M:%S %Y}",
+        f"Containers: {','.join(names)}",
+        '',
+        'Summary Statistics:',
+        '-------------------',
+    ]
+    for name in names:
+        metrics_file = metrics_file_for(name)
+        if not os.path.exists(metrics_file):
+            continue
+        # Single streaming pass, nothing but running sums kept in memory
+        count = cpu = mem = response = probes = 0
+        with open(metrics_file) as f:
+            next(f, None)
+            for row in f:
+                parts = row.rstrip('\n').split(',')
+                try:
+                    cpu += float(parts[1])
+                    mem += float(parts[3])
+                except (IndexError, ValueError):
+                    continue
+                count += 1
+                # Blank for targets without an HTTP health probe
+                try:
+                    response += float(parts[4])
+                    probes += 1
+                except (IndexError, ValueError):
+                    pass
+        count = count or 1
+        lines += [
+            f"[{name}]",
+            f"Average CPU Usage: {cpu / count:.2f}%",
+            f"Average Memory Usage: {mem / count:.2f}%",
+        ]
+        if probes:
+            lines.append(f"Average Response Time: {response / probes:.0f}ms")
+        lines.append('')
+
+    lines += ['Recent Alerts:', '--------------']
+    try:
+        lines += tail_lines(ALERT_LOG, 10)[0]
+    except OSError:
+        lines.append('No recent alerts')
+
+    with open(report_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    log_message('INFO', f"Report generated: {report_file}")
+    print(report_file)
+    return report_file
+
+
+def draw_bar(value, width=50):
+    """Colored gauge, green/yellow/red like the shell monitor"""
+    filled = max(0, min(width, int(round(value * width / 100))))
+    color = '\033[32m'
+    if value > 80:
+        color = '\033[31m'
+    elif value > 60:
+        color = '\033[33m'
+    return f"{color}{'▓' * filled}\033[0m{'░' * (width - filled)}"
+
+
+def render_live(primary, others):
+    """Build one frame of the live view"""
+    out = [
+        '╔════════════════════════════════════════════════════════════════════╗',
+        f"║              Container Live Monitor - {now()}              ║",
+        '╚════════════════════════════════════════════════════════════════════╝',
+        '',
+    ]
+    if primary.get('state') != 'running':
+        out += ['🔴 Container Status: STOPPED', '', 'Waiting for container to start...']
+        return out
+
+    out += [
+        f"🟢 Container Status: RUNNING ({primary['name']})",
+        '',
+        '📊 Resource Usage:',
+        '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━',
+        f"CPU Usage:     {primary['cpu']:5.1f}% {draw_bar(primary['cpu'])}",
+        f"Memory Usage:  {primary['memory_percent']:5.1f}% {draw_bar(primary['memory_percent'])}",
+        '',
+        '📈 Performance Metrics:',
+        '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━',
+        f"Memory Used:     {primary['memory_used']} MB",
+        f"Response Time:   {'-' if primary['response_time'] is None else primary['response_time']} ms",
+        f"App Health:      {primary['app_status'].upper()}",
+        '',
+        '⚠️  Alerts:',
+        '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━',
+    ]
+    if primary['alerts']:
+        out += [f"🔴 {alert_type.upper()}: {message}" for alert_type, message in primary['alerts']]
+    else:
+        out.append('✅ All systems normal')
+
+    if others:
+        out += ['', '📦 Containers:', '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━',
+                f"  {'NAME':<24} {'CPU%':>8} {'MEM%':>8} {'RESP(ms)':>10}  HEALTH"]
+        for s in others:
+            if s.get('state') != 'running':
+                out.append(f"  {s['name']:<24} {'-':>8} {'-':>8} {'-':>10}  {s.get('state', '').upper()}")
+            else:
+                response = '-' if s['response_time'] is None else s['response_time']
+                out.append(f"  {s['name']:<24} {s['cpu']:>8} {s['memory_percent']:>8} "
+                           f"{response:>10}  {s['app_status']}")
+    return out
+
+
+def live_monitor(names):
+    initialize_logs(names)
+    log_message('INFO', 'Starting live monitoring mode', echo=False)
+    stats = StatsCollector(names).start()
+    collector = Collector(names, stats_source=stats, echo=False)
+    # Give the streams a moment to deliver their first sample
+    time.sleep(min(LIVE_INTERVAL, 2))
+
+    sys.stdout.write('\033[2J')
+    while True:
+        started = time.time()
+        collector.set_targets(resolve_targets())
+        samples = collector.run_cycle()
+        frame = render_live(samples[0], samples[1:]) if samples else ['No containers to monitor']
+        frame += ['', '📋 Recent Activity:', '━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━']
+        frame += ['  ' + line for line in tail_lines(LOG_FILE, 3)[0]]
+        frame += ['', 'Press Ctrl+C to exit']
+        # Redraw in place: cursor home, each line cleared to its end
+        sys.stdout.write('\033[H' + '\n'.join(line + '\033[K' for line in frame) + '\033[J')
+        sys.stdout.flush()
+        time.sleep(max(0, LIVE_INTERVAL - (time.time() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Container monitoring collector')
+    parser.add_argument('mode', nargs='?', default='monitor',
+                        choices=['monitor', 'report', 'continuous', 'live'])
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, lambda *_: (print('\n\nExiting monitor...'), sys.exit(0)))
+    names = resolve_targets()
+
+    if args.mode == 'monitor':
+        initialize_logs(names)
+        Collector(names).run_cycle()
+    elif args.mode == 'report':
+        generate_report(names)
+    elif args.mode == 'continuous':
+        initialize_logs(names)
+        log_message('INFO', 'Starting continuous monitoring (Ctrl+C to stop)')
+        collector = Collector(names)
+        while True:
+            started = time.time()
+            collector.set_targets(resolve_targets())
+            collector.run_cycle()
+            time.sleep(max(0, CONTINUOUS_INTERVAL - (time.time() - started)))
+    elif args.mode == 'live':
+        live_monitor(names)
+
+
+if __name__ == '__main__':
+    main()
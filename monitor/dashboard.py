@@ -1,91 +1,164 @@
 #!/usr/bin/env python3
-from flask import Flask, render_template, jsonify
-import subprocess
-import json
-import csv
+from flask import Flask, Response, render_template, jsonify, request
+from markupsafe import escape
 import os
+import threading
+import time
 from datetime import datetime
 
+from docker_stats import StatsCollector
+from targets import CONTAINER_NAME, CONTAINER_LABEL, metrics_file_for, resolve_targets
+from metrics_store import CsvMetricsStore
+from tailer import RecentLines
+from events import EventHub
+
 app = Flask(__name__)
 
 # Configuration
-CONTAINER_NAME = os.getenv('CONTAINER_NAME', 'monitored-app')
-METRICS_FILE = '/var/log/container_metrics.csv'
 ALERTS_FILE = '/var/log/container_alerts.log'
+HISTORY_POINTS = 50
+ALERT_POINTS = 10
+HISTORY_CAPACITY = int(os.getenv('HISTORY_CAPACITY', 3600))
+STREAM_INTERVAL = float(os.getenv('STREAM_INTERVAL', 2))
+TARGET_REFRESH_INTERVAL = float(os.getenv('TARGET_REFRESH_INTERVAL', 30))
+# Open /api/stream clients per worker. Each holds a server thread (see
+# gunicorn.conf.py), so further streams are refused and those pages poll
+MAX_STREAMS = int(os.getenv('DASHBOARD_STREAMS', 50))
 
-def get_container_stats():
-    """Get current container statistics"""
-    try:
-        # Get container stats
-        cmd = f"docker stats --no-stream --format '{{{{json .}}}}' {CONTAINER_NAME}"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        
-        if result.returncode == 0 and result.stdout:
-            stats = json.loads(result.stdout)
-            
-            # Parse CPU percentage
-            cpu = float(stats.get('CPUPerc', '0%').rstrip('%'))
-            
-            # Parse memory
-            mem_usage = stats.get('MemUsage', '0MiB / 0MiB')
-            mem_parts = mem_usage.split(' / ')
-            mem_used = mem_parts[0].replace('MiB', '').replace('GiB', '')
-            mem_limit = mem_parts[1].replace('MiB', '').replace('GiB', '')
-            
-            # Calculate memory percentage
-            try:
-                mem_percent = (float(mem_used) / float(mem_limit)) * 100
-            except:
-                mem_percent = 0
-            
-            return {
-                'cpu': cpu,
-                'memory_percent': mem_percent,
-                'memory_used': mem_used,
-                'memory_limit': mem_limit,
-                'status': 'running'
-            }
-    except Exception as e:
-        print(f"Error getting stats: {e}")
-    
-    return {
-        'cpu': 0,
-        'memory_percent': 0,
-        'memory_used': 0,
-        'memory_limit': 0,
-        'status': 'error'
-    }
+# Containers currently monitored, refreshed from the label selector if set
+monitored = []
 
-def get_metrics_history():
-    """Get historical metrics from CSV file"""
-    metrics = []
-    if os.path.exists(METRICS_FILE):
+# One persistent Docker stats stream per container, read by /api/stats
+stats_collector = StatsCollector([])
+
+# Per-container fixed-size history, seeded from the CSV tail and fed with appended rows
+metrics_stores = {}
+stores_lock = threading.Lock()
+
+# Last few alert lines, tail-seeded and then read from the tracked offset
+recent_alerts = RecentLines(ALERTS_FILE, ALERT_POINTS)
+
+def get_store(name):
+    """Return the metrics ring buffer for a container, creating it on first use"""
+    with stores_lock:
+        store = metrics_stores.get(name)
+        if store is None:
+            store = CsvMetricsStore(metrics_file_for(name), HISTORY_CAPACITY)
+            store.seed()
+            metrics_stores[name] = store
+        return store
+
+def refresh_targets():
+    """Resolve the target set and open/close stats streams to match"""
+    names = resolve_targets()
+    stats_collector.set_containers(names)
+    for name in names:
+        get_store(name)
+    monitored[:] = names
+
+def target_refresher():
+    """Pick up containers that gain or lose the selector label"""
+    while True:
+        time.sleep(TARGET_REFRESH_INTERVAL)
         try:
-            with open(METRICS_FILE, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    metrics.append(row)
-            # Return last 50 entries
-            return metrics[-50:] if len(metrics) > 50 else metrics
-        except:
-            pass
-    return []
+            refresh_targets()
+        except Exception as e:
+            print(f"Error refreshing targets: {e}")
+
+def selected_container():
+    """Container named by ?container=, defaulting to the first target"""
+    name = request.args.get('container')
+    if name is None:
+        return monitored[0] if monitored else CONTAINER_NAME
+    return name if name in monitored else None
+
+def get_container_stats(name=CONTAINER_NAME):
+    """Get current container statistics from the streaming collector snapshot"""
+    return stats_collector.get(name)
+
+def get_metrics_history(name=CONTAINER_NAME):
+    """Get the most recent metrics from the in-memory ring buffer"""
+    return get_store(name).history(HISTORY_POINTS)
 
 def get_recent_alerts():
-    """Get recent alerts"""
-    alerts = []
-    if os.path.exists(ALERTS_FILE):
-        try:
-            with open(ALERTS_FILE, 'r') as f:
-                lines = f.readlines()
-            # Return last 10 alerts
-            return [line.strip() for line in lines[-10:]]
-        except:
-            pass
-    return []
+    """Get recent alerts, reading only lines appended since the last call"""
+    return recent_alerts.recent()
+
+def get_containers():
+    """Latest stats and last logged sample for every monitored container"""
+    containers = []
+    for name in list(monitored):
+        last = get_store(name).history(1)
+        containers.append({
+            'name': name,
+            'stats': get_container_stats(name),
+            'last_sample': last[0] if last else None
+        })
+    return containers
+
+def up_to(items, seq, cursor):
+    """Items of a since() result, ending at `seq`, that were added by `cursor`"""
+    return items[:max(len(items) - (seq - cursor), 0)]
+
+def stream_builders(name):
+    """Build the snapshot and per-tick delta functions for one container's stream"""
+    store = get_store(name)
+    store.poll()
+    recent_alerts.poll()
+    # Producer cursors into the sample and alert buffers. A snapshot covers
+    # everything up to them, and the next delta continues from them
+    cursor = {'seq': store.ring.seq, 'alert_seq': recent_alerts.seq}
+
+    def build_stream_snapshot():
+        """Full state sent once when a client opens /api/stream"""
+        history, seq = store.ring.since(max(0, cursor['seq'] - HISTORY_POINTS))
+        alerts, alert_seq = recent_alerts.since(0)
+        return {
+            'stats': get_container_stats(name),
+            'history': up_to(history, seq, cursor['seq']),
+            'seq': cursor['seq'],
+            'alerts': up_to(alerts, alert_seq, cursor['alert_seq']),
+            'alert_seq': cursor['alert_seq']
+        }
+
+    def build_stream_delta():
+        store.poll()
+        recent_alerts.poll()
+        samples, cursor['seq'] = store.ring.since(cursor['seq'])
+        alerts, cursor['alert_seq'] = recent_alerts.since(cursor['alert_seq'])
+        return {
+            'stats': get_container_stats(name),
+            'samples': samples,
+            'seq': cursor['seq'],
+            'alerts': alerts,
+            'alert_seq': cursor['alert_seq']
+        }
+    return build_stream_snapshot, build_stream_delta
+
+# One producer per watched container, shared by all of its /api/stream subscribers
+stream_hubs = {}
+# Separate from stores_lock: building a hub calls get_store()
+hubs_lock = threading.Lock()
+
+def get_stream_hub(name):
+    with hubs_lock:
+        hub = stream_hubs.get(name)
+        if hub is None:
+            build_snapshot, build_delta = stream_builders(name)
+            hub = stream_hubs[name] = EventHub(build_delta, interval=STREAM_INTERVAL,
+                                               build_snapshot=build_snapshot)
+        return hub
+
+def start_monitoring():
+    stats_collector.start()
+    refresh_targets()
+    recent_alerts.seed()
+    if CONTAINER_LABEL:
+        threading.Thread(target=target_refresher, daemon=True).start()
 
 @app.route('/')
 def dashboard():
+    name = selected_container() or CONTAINER_NAME
     return '''
 <!DOCTYPE html>
 <html>
@@ -180,7 +253,9 @@ def dashboard():
     <div class="container">
         <div class="header">
             <h1>Container Monitor Dashboard</h1>
-            <p>Real-time monitoring for ''' + CONTAINER_NAME + '''</p>
+            <p>Real-time monitoring for ''' + str(escape(name)) + '''
+                <select id="container-select" style="margin-left: 10px"></select>
+            </p>
         </div>
         
         <div class="metrics">
@@ -251,75 +326,159 @@ def dashboard():
             }
         });
         
-        // Update dashboard
+        // Update status and gauges
+        function renderStats(data) {
+            const statusIndicator = document.getElementById('status-indicator');
+            const statusText = document.getElementById('container-status');
+            
+            if (data.status === 'running') {
+                statusIndicator.className = 'status-indicator status-running';
+                statusText.textContent = 'Running';
+            } else {
+                statusIndicator.className = 'status-indicator status-stopped';
+                statusText.textContent = 'Stopped';
+            }
+            
+            // Update CPU
+            document.getElementById('cpu-value').textContent = data.cpu.toFixed(1) + '%';
+            document.getElementById('cpu-gauge').style.width = data.cpu + '%';
+            
+            // Update Memory
+            document.getElementById('memory-value').textContent = data.memory_percent.toFixed(1) + '%';
+            document.getElementById('memory-gauge').style.width = data.memory_percent + '%';
+            document.getElementById('memory-details').textContent = 
+                `${data.memory_used} MB / ${data.memory_limit} MB`;
+        }
+        
+        // Update alerts
+        let alerts = [];
+        function renderAlerts() {
+            const alertsList = document.getElementById('alerts-list');
+            if (alerts.length === 0) {
+                alertsList.innerHTML = 'No recent alerts';
+            } else {
+                alertsList.innerHTML = alerts.map(alert => 
+                    `<div class="alert-item">${alert}</div>`
+                ).join('');
+            }
+        }
+        
+        // Update chart, keeping at most HISTORY_POINTS points
+        function addHistory(history) {
+            history.forEach(item => {
+                chart.data.labels.push(new Date(item.timestamp).toLocaleTimeString());
+                chart.data.datasets[0].data.push(parseFloat(item.cpu_percent));
+                chart.data.datasets[1].data.push(parseFloat(item.memory_percent));
+            });
+            const excess = chart.data.labels.length - HISTORY_POINTS;
+            if (excess > 0) {
+                chart.data.labels.splice(0, excess);
+                chart.data.datasets.forEach(dataset => dataset.data.splice(0, excess));
+            }
+            chart.update();
+        }
+        
+        function resetHistory(history) {
+            chart.data.labels = [];
+            chart.data.datasets.forEach(dataset => dataset.data = []);
+            addHistory(history);
+        }
+        
+        // Drop items a delta repeats from the snapshot; `seq` counts the last item
+        function unseen(items, seq, lastSeq) {
+            return items.slice(Math.max(0, lastSeq - (seq - items.length)));
+        }
+        
+        // Poll all three endpoints (fallback when EventSource is unavailable)
         function updateDashboard() {
-            fetch('/api/stats')
+            fetch('/api/stats' + QUERY)
                 .then(response => response.json())
-                .then(data => {
-                    // Update status
-                    const statusIndicator = document.getElementById('status-indicator');
-                    const statusText = document.getElementById('container-status');
-                    
-                    if (data.status === 'running') {
-                        statusIndicator.className = 'status-indicator status-running';
-                        statusText.textContent = 'Running';
-                    } else {
-                        statusIndicator.className = 'status-indicator status-stopped';
-                        statusText.textContent = 'Stopped';
-                    }
-                    
-                    // Update CPU
-                    document.getElementById('cpu-value').textContent = data.cpu.toFixed(1) + '%';
-                    document.getElementById('cpu-gauge').style.width = data.cpu + '%';
-                    
-                    // Update Memory
-                    document.getElementById('memory-value').textContent = data.memory_percent.toFixed(1) + '%';
-                    document.getElementById('memory-gauge').style.width = data.memory_percent + '%';
-                    document.getElementById('memory-details').textContent = 
-                        `${data.memory_used} MB / ${data.memory_limit} MB`;
-                });
-            
-            // Update alerts
+                .then(renderStats);
             fetch('/api/alerts')
                 .then(response => response.json())
-                .then(alerts => {
-                    const alertsList = document.getElementById('alerts-list');
-                    if (alerts.length === 0) {
-                        alertsList.innerHTML = 'No recent alerts';
-                    } else {
-                        alertsList.innerHTML = alerts.map(alert => 
-                            `<div class="alert-item">${alert}</div>`
-                        ).join('');
-                    }
-                });
-            
-            // Update chart
-            fetch('/api/history')
+                .then(data => { alerts = data; renderAlerts(); });
+            fetch('/api/history' + QUERY)
                 .then(response => response.json())
-                .then(history => {
-                    const timestamps = history.map(item => 
-                        new Date(item.timestamp).toLocaleTimeString());
-                    const cpuData = history.map(item => parseFloat(item.cpu_percent));
-                    const memoryData = history.map(item => parseFloat(item.memory_percent));
-                    
-                    chart.data.labels = timestamps;
-                    chart.data.datasets[0].data = cpuData;
-                    chart.data.datasets[1].data = memoryData;
-                    chart.update();
-                });
+                .then(resetHistory);
         }
         
-        // Update every 2 seconds
-        updateDashboard();
-        setInterval(updateDashboard, 2000);
+        const CONTAINER = new URLSearchParams(location.search).get('container');
+        const QUERY = CONTAINER ? '?container=' + encodeURIComponent(CONTAINER) : '';
+        
+        // Container picker, switching reloads the page for that container
+        fetch('/api/containers')
+            .then(response => response.json())
+            .then(containers => {
+                const select = document.getElementById('container-select');
+                containers.forEach(container => {
+                    const option = document.createElement('option');
+                    option.value = option.textContent = container.name;
+                    option.selected = container.name === (CONTAINER || containers[0].name);
+                    select.appendChild(option);
+                });
+                select.style.display = containers.length > 1 ? '' : 'none';
+                select.onchange = () => location.search = '?container=' + encodeURIComponent(select.value);
+            });
+        
+        const HISTORY_POINTS = ''' + str(HISTORY_POINTS) + ''';
+        const ALERT_POINTS = ''' + str(ALERT_POINTS) + ''';
+        
+        if (window.EventSource) {
+            // Server pushes a full snapshot once, then only deltas
+            let seq = 0, alertSeq = 0;
+            const source = new EventSource('/api/stream' + QUERY);
+            source.onerror = () => {
+                // Refused at the stream limit, or the server went away: poll instead
+                if (source.readyState === EventSource.CLOSED) {
+                    updateDashboard();
+                    setInterval(updateDashboard, 2000);
+                }
+            };
+            source.addEventListener('snapshot', event => {
+                const data = JSON.parse(event.data);
+                renderStats(data.stats);
+                alerts = data.alerts;
+                renderAlerts();
+                resetHistory(data.history);
+                seq = data.seq;
+                alertSeq = data.alert_seq;
+            });
+            source.addEventListener('delta', event => {
+                const data = JSON.parse(event.data);
+                renderStats(data.stats);
+                const samples = unseen(data.samples, data.seq, seq);
+                if (samples.length) addHistory(samples);
+                const newAlerts = unseen(data.alerts, data.alert_seq, alertSeq);
+                if (newAlerts.length) {
+                    alerts = alerts.concat(newAlerts).slice(-ALERT_POINTS);
+                    renderAlerts();
+                }
+                seq = Math.max(seq, data.seq);
+                alertSeq = Math.max(alertSeq, data.alert_seq);
+            });
+        } else {
+            // Update every 2 seconds
+            updateDashboard();
+            setInterval(updateDashboard, 2000);
+        }
     </script>
 </body>
 </html>
 '''
 
+def unknown_container():
+    return jsonify({'error': f"unknown container {request.args.get('container')!r}"}), 404
+
+@app.route('/api/containers')
+def api_containers():
+    return jsonify(get_containers())
+
 @app.route('/api/stats')
 def api_stats():
-    return jsonify(get_container_stats())
+    name = selected_container()
+    if name is None:
+        return unknown_container()
+    return jsonify(get_container_stats(name))
 
 @app.route('/api/alerts')
 def api_alerts():
@@ -327,7 +486,25 @@ def api_alerts():
 
 @app.route('/api/history')
 def api_history():
-    return jsonify(get_metrics_history())
+    name = selected_container()
+    if name is None:
+        return unknown_container()
+    return jsonify(get_metrics_history(name))
+
+@app.route('/api/stream')
+def api_stream():
+    name = selected_container()
+    if name is None:
+        return unknown_container()
+    with hubs_lock:
+        streams = sum(hub.subscriber_count() for hub in stream_hubs.values())
+    if streams >= MAX_STREAMS:
+        return jsonify({'error': 'too many open streams'}), 503, {'Retry-After': '30'}
+    return Response(get_stream_hub(name).stream(),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=True)
+    start_monitoring()
+    # Development server; production runs under gunicorn (gunicorn.conf.py)
+    app.run(host='0.0.0.0', port=8000, debug=os.getenv('DASHBOARD_DEBUG') == '1')
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Docker Engine API stats collector.
+
+Keeps one streaming `/containers/<name>/stats` connection per container open
+over the Docker unix socket and publishes the latest parsed sample into an
+in-memory snapshot, so readers never wait on the Docker daemon.
+"""
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+from urllib.parse import quote
+
+DOCKER_SOCKET = os.getenv('DOCKER_SOCKET', '/var/run/docker.sock')
+
+# A sample older than this is reported as an error (stream stalled)
+STALE_AFTER = float(os.getenv('STATS_STALE_AFTER', 10))
+
+
+class DockerAPIError(RuntimeError):
+    """Non-200 response from the Docker Engine API"""
+
+    def __init__(self, path, status, body):
+        super().__init__(f"Docker API {path} returned {status}: {body[:200]!r}")
+        self.status = status
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection that talks to the Docker daemon over its unix socket"""
+
+    def __init__(self, socket_path=DOCKER_SOCKET, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def docker_get(path, timeout=5):
+    """Perform a one-shot GET against the Docker Engine API and decode JSON"""
+    conn = UnixHTTPConnection(timeout=timeout)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise DockerAPIError(path, response.status, body)
+        return json.loads(body)
+    finally:
+        conn.close()
+
+
+def list_containers(label=None, all_states=False):
+    """Return names of containers, optionally filtered by a label selector"""
+    path = '/containers/json'
+    params = []
+    if all_states:
+        params.append('all=1')
+    if label:
+        params.append('filters=' + quote(json.dumps({'label': [label]})))
+    if params:
+        path += '?' + '&'.join(params)
+    return [c['Names'][0].lstrip('/') for c in docker_get(path) if c.get('Names')]
+
+
+def parse_stats(raw):
+    """Convert a raw Engine API stats document into the dashboard format"""
+    cpu_stats = raw.get('cpu_stats') or {}
+    precpu_stats = raw.get('precpu_stats') or {}
+
+    # Same formula the docker CLI uses for CPUPerc
+    cpu_delta = (cpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+                 - precpu_stats.get('cpu_usage', {}).get('total_usage', 0))
+    system_delta = (cpu_stats.get('system_cpu_usage', 0)
+                    - precpu_stats.get('system_cpu_usage', 0))
+    online_cpus = cpu_stats.get('online_cpus') or \
+        len(cpu_stats.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+    cpu = 0.0
+    if cpu_delta > 0 and system_delta > 0:
+        cpu = cpu_delta / system_delta * online_cpus * 100
+
+    # Memory usage excludes page cache, like `docker stats`
+    mem_stats = raw.get('memory_stats') or {}
+    detail = mem_stats.get('stats') or {}
+    cache = detail.get('inactive_file', detail.get('total_inactive_file', 0))
+    mem_used = max(mem_stats.get('usage', 0) - cache, 0) / (1024 * 1024)
+    mem_limit = mem_stats.get('limit', 0) / (1024 * 1024)
+    mem_percent = (mem_used / mem_limit) * 100 if mem_limit else 0
+
+    return {
+        'cpu': round(cpu, 2),
+        'memory_percent': round(mem_percent, 2),
+        'memory_used': round(mem_used, 2),
+        'memory_limit': round(mem_limit, 2),
+        'status': 'running'
+    }
+
+
+def empty_stats(status='error'):
+    return {
+        'cpu': 0,
+        'memory_percent': 0,
+        'memory_used': 0,
+        'memory_limit': 0,
+        'status': status
+    }
+
+
+class StatsCollector:
+    """Background collector holding one stats stream per container"""
+
+    def __init__(self, containers, retry_delay=2):
+        self.containers = set(containers)
+        self.retry_delay = retry_delay
+        self._snapshot = {}
+        self._updated = {}
+        self._lock = threading.Lock()
+        self._threads = {}
+
+    def start(self):
+        with self._lock:
+            for name in self.containers:
+                self._start_stream(name)
+        return self
+
+    def set_containers(self, names):
+        """Track exactly `names`, opening and retiring streams as needed"""
+        with self._lock:
+            self.containers = set(names)
+            for name in self.containers:
+                if name not in self._threads:
+                    self._start_stream(name)
+            for name in list(self._snapshot):
+                if name not in self.containers:
+                    del self._snapshot[name]
+                    self._updated.pop(name, None)
+
+    def _tracked(self, name):
+        with self._lock:
+            return name in self.containers
+
+    def _start_stream(self, name):
+        thread = threading.Thread(target=self._stream, args=(name,),
+                                  name=f'stats-{name}', daemon=True)
+        self._threads[name] = thread
+        thread.start()
+
+    def _publish(self, name, stats):
+        with self._lock:
+            if name in self.containers:
+                self._snapshot[name] = stats
+                self._updated[name] = time.time()
+
+    def _stream(self, name):
+        """Follow the streaming stats endpoint, reconnecting when it drops"""
+        while self._tracked(name):
+            conn = None
+            try:
+                conn = UnixHTTPConnection()
+                conn.request('GET', f'/containers/{name}/stats?stream=true')
+                response = conn.getresponse()
+                if response.status == 404:
+                    self._publish(name, empty_stats('stopped'))
+                elif response.status == 200:
+                    # One JSON document per line, roughly once per second
+                    for line in response:
+                        if name not in self.containers:
+                            break
+                        line = line.strip()
+                        if line:
+                            self._publish(name, parse_stats(json.loads(line)))
+                    # Stream ends when the container stops
+                    self._publish(name, empty_stats('stopped'))
+                else:
+                    print(f"Stats stream for {name} returned {response.status}")
+            except Exception as e:
+                print(f"Error streaming stats for {name}: {e}")
+                self._publish(name, empty_stats())
+            finally:
+                if conn is not None:
+                    conn.close()
+            time.sleep(self.retry_delay)
+        with self._lock:
+            del self._threads[name]
+            # Re-added by set_containers() while this thread was winding down
+            if name in self.containers:
+                self._start_stream(name)
+
+    def get(self, name):
+        """Return the latest sample for a container without blocking on Docker"""
+        with self._lock:
+            stats = self._snapshot.get(name)
+            updated = self._updated.get(name, 0)
+        if stats is None:
+            return empty_stats()
+        if stats['status'] == 'running' and time.time() - updated > STALE_AFTER:
+            return empty_stats()
+        return dict(stats)
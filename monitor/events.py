@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Server-Sent Events fan-out for the dashboard.
+
+A single producer thread builds one delta per tick (latest stats plus any
+new samples and alerts) and hands the same encoded message to every
+subscriber queue, so collection work does not grow with open dashboards.
+A new subscriber's snapshot is built between two ticks, so the next delta
+continues exactly where the snapshot ends.
+"""
+import json
+import queue
+import threading
+import time
+
+
+def format_event(event, data):
+    """Encode one SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventHub:
+    """Shared producer broadcasting delta events to SSE subscribers"""
+
+    def __init__(self, build_delta, interval=2, queue_size=30, build_snapshot=None):
+        self.build_delta = build_delta
+        self.build_snapshot = build_snapshot
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        # Held while a delta is built and published, and while a snapshot is built
+        self._tick_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sse-producer', daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(message)
+            except queue.Full:
+                # Slow client, drop it rather than buffer without bound
+                self.unsubscribe(q)
+
+    def _tick(self):
+        try:
+            self.publish(format_event('delta', self.build_delta()))
+        except Exception as e:
+            print(f"Error building stream delta: {e}")
+
+    def _run(self):
+        while True:
+            started = time.time()
+            if self.subscriber_count():
+                with self._tick_lock:
+                    self._tick()
+            time.sleep(max(0, self.interval - (time.time() - started)))
+
+    def stream(self):
+        """Generator yielding SSE text for one client until it disconnects"""
+        with self._tick_lock:
+            if not self.subscriber_count():
+                # Idle producer: advance its cursors so the first delta only
+                # carries what arrives after this snapshot
+                self._tick()
+            q = self.subscribe()
+            initial = self.build_snapshot() if self.build_snapshot is not None else None
+        try:
+            if initial is not None:
+                yield format_event('snapshot', initial)
+            while True:
+                try:
+                    yield q.get(timeout=self.interval * 5)
+                except queue.Empty:
+                    with self._lock:
+                        if q not in self._subscribers:
+                            return
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keepalive\n\n'
+        finally:
+            self.unsubscribe(q)
@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for the dashboard: `gunicorn -c gunicorn.conf.py dashboard:app`.
+
+Every /api/stream client holds a worker thread for as long as it stays
+connected. Each worker therefore gets DASHBOARD_STREAMS threads for streams
+(50 concurrent dashboards by default) plus DASHBOARD_THREADS for page loads
+and the JSON endpoints. dashboard.py refuses streams past DASHBOARD_STREAMS
+and those pages poll instead, so streams never take the threads /api/stats
+needs. Each worker builds its own state from Docker and the CSV logs, so
+extra workers are safe, just redundant. The app is imported in the workers,
+not the master, so `kill -HUP <master pid>` replaces them gracefully with
+the current code.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('DASHBOARD_PORT', '8000')}"
+workers = int(os.getenv('DASHBOARD_WORKERS', 1))
+worker_class = 'gthread'
+DASHBOARD_STREAMS = int(os.getenv('DASHBOARD_STREAMS', 50))
+threads = DASHBOARD_STREAMS + int(os.getenv('DASHBOARD_THREADS', 16))
+keepalive = int(os.getenv('DASHBOARD_KEEPALIVE', 5))
+graceful_timeout = int(os.getenv('DASHBOARD_GRACEFUL_TIMEOUT', 10))
+accesslog = os.getenv('DASHBOARD_ACCESS_LOG') or None
+
+
+def post_worker_init(worker):
+    # Collector threads must start inside the worker, not in the master
+    import dashboard
+    dashboard.start_monitoring()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Fixed-capacity ring buffer of typed metric samples.
+
+Samples are kept in parallel `array` columns so memory is bounded by the
+capacity and a history query only touches the rows it returns.
+"""
+import threading
+import time
+from array import array
+
+from tailer import LogTailer
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+FIELDS = ['timestamp', 'cpu_percent', 'memory_usage_mb', 'memory_percent',
+          'response_time_ms', 'status']
+
+# Status strings are stored as small integer codes
+STATUSES = ['unknown', 'healthy', 'unhealthy']
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def parse_csv_line(line):
+    """Parse one metrics CSV line into a sample tuple, or None if invalid"""
+    parts = line.strip().split(',')
+    if len(parts) != len(FIELDS) or parts[0] == 'timestamp':
+        return None
+    try:
+        ts = time.mktime(time.strptime(parts[0], TIMESTAMP_FORMAT))
+    except ValueError:
+        return None
+    return (ts, _to_float(parts[1]), _to_float(parts[2]), _to_float(parts[3]),
+            _to_float(parts[4]), parts[5])
+
+
+def sample_to_dict(sample):
+    ts, cpu, mem_mb, mem_pct, resp_ms, status = sample
+    return {
+        'timestamp': time.strftime(TIMESTAMP_FORMAT, time.localtime(ts)),
+        'cpu_percent': cpu,
+        'memory_usage_mb': mem_mb,
+        'memory_percent': mem_pct,
+        'response_time_ms': resp_ms,
+        'status': status
+    }
+
+
+class MetricsRing:
+    """Array-backed ring buffer of (timestamp, cpu, mem MB, mem %, response ms, status)"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._ts = array('d', bytes(8 * capacity))
+        self._cpu = array('d', bytes(8 * capacity))
+        self._mem_mb = array('d', bytes(8 * capacity))
+        self._mem_pct = array('d', bytes(8 * capacity))
+        self._resp_ms = array('d', bytes(8 * capacity))
+        self._status = array('b', bytes(capacity))
+        self._next = 0
+        self._size = 0
+        # Total samples ever appended, used as a cursor by stream readers
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size
+
+    def append(self, ts, cpu, mem_mb, mem_pct, resp_ms, status):
+        code = STATUSES.index(status) if status in STATUSES else 0
+        with self._lock:
+            i = self._next
+            self._ts[i] = ts
+            self._cpu[i] = cpu
+            self._mem_mb[i] = mem_mb
+            self._mem_pct[i] = mem_pct
+            self._resp_ms[i] = resp_ms
+            self._status[i] = code
+            self._next = (i + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self.seq += 1
+
+    def latest(self, count):
+        """Return the newest `count` samples, oldest first, as dicts"""
+        with self._lock:
+            return self._latest(count)
+
+    def since(self, seq):
+        """Return (samples appended after cursor `seq`, new cursor)"""
+        with self._lock:
+            return self._latest(self.seq - seq), self.seq
+
+    def _latest(self, count):
+        rows = []
+        count = min(count, self._size)
+        start = (self._next - count) % self.capacity
+        for n in range(count):
+            i = (start + n) % self.capacity
+            rows.append(sample_to_dict((self._ts[i], self._cpu[i], self._mem_mb[i],
+                                        self._mem_pct[i], self._resp_ms[i],
+                                        STATUSES[self._status[i]])))
+        return rows
+
+
+class CsvMetricsStore:
+    """Ring buffer seeded from the tail of the metrics CSV and fed incrementally"""
+
+    def __init__(self, path, capacity=3600):
+        self.path = path
+        self.ring = MetricsRing(capacity)
+        self.tailer = LogTailer(path)
+        self._lock = threading.Lock()
+
+    def seed(self):
+        """Load the newest rows once by seeking from the end of the CSV"""
+        with self._lock:
+            self._append_lines(self.tailer.tail(self.ring.capacity))
+
+    def poll(self):
+        """Append rows written since the last poll and return them"""
+        with self._lock:
+            return self._append_lines(self.tailer.read_new())
+
+    def history(self, count):
+        self.poll()
+        return self.ring.latest(count)
+
+    def _append_lines(self, lines):
+        samples = []
+        for line in lines:
+            sample = parse_csv_line(line)
+            if sample:
+                self.ring.append(*sample)
+                samples.append(sample_to_dict(sample))
+        return samples
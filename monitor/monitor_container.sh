@@ -6,21 +6,61 @@
 
 # Configuration
 CONTAINER_NAME="${CONTAINER_NAME:-monitored-app}"
+CONTAINER_NAMES="${CONTAINER_NAMES:-}"      # comma separated list of containers
+CONTAINER_LABEL="${CONTAINER_LABEL:-}"      # label selector, e.g. app=heavy
+MAX_PARALLEL="${MAX_PARALLEL:-16}"          # containers sampled at once
 LOG_FILE="/var/log/container_monitor.log"
 ALERT_LOG="/var/log/container_alerts.log"
 METRICS_FILE="/var/log/container_metrics.csv"
+METRICS_HEADER="timestamp,cpu_percent,memory_usage_mb,memory_percent,response_time_ms,status"
+
+# With more than one possible target every container gets its own CSV
+MULTI_CONTAINER=0
+if [ -n "$CONTAINER_LABEL" ] || [[ "$CONTAINER_NAMES" == *,* ]]; then
+    MULTI_CONTAINER=1
+fi
 
 # Thresholds
 CPU_THRESHOLD="$CPU_THRESHOLD"     # 40% of allocated CPU
 MEMORY_THRESHOLD="$MEMORY_THRESHOLD"  # 80% of allocated memory
 RESPONSE_TIME_THRESHOLD="$RESPONSE_TIME_THRESHOLD"  # 1 second in milliseconds
 
+# Containers to monitor: label selector, name list, or the single container
+resolve_targets() {
+    if [ -n "$CONTAINER_LABEL" ]; then
+        docker ps --filter "label=$CONTAINER_LABEL" --format '{{.Names}}'
+    elif [ -n "$CONTAINER_NAMES" ]; then
+        echo "$CONTAINER_NAMES" | tr ',' '\n' | sed '/^$/d'
+    else
+        echo "$CONTAINER_NAME"
+    fi
+}
+
+# Metrics CSV for one container
+metrics_file_for() {
+    if [ "$MULTI_CONTAINER" -eq 1 ]; then
+        echo "/var/log/container_metrics_$1.csv"
+    else
+        echo "$METRICS_FILE"
+    fi
+}
+
+# Create a metrics CSV with its header if it is missing or empty
+initialize_metrics_file() {
+    local file="$1"
+    touch "$file"
+    if [ ! -s "$file" ]; then
+        echo "$METRICS_HEADER" > "$file"
+    fi
+}
+
 # Initialize log files
 initialize_logs() {
-    touch "$LOG_FILE" "$ALERT_LOG" "$METRICS_FILE"
-    if [ ! -s "$METRICS_FILE" ]; then
-        echo "timestamp,cpu_percent,memory_usage_mb,memory_percent,response_time_ms,status" > "$METRICS_FILE"
-    fi
+    touch "$LOG_FILE" "$ALERT_LOG"
+    local name
+    for name in $(resolve_targets); do
+        initialize_metrics_file "$(metrics_file_for "$name")"
+    done
 }
 
 # Logging function
@@ -41,7 +81,8 @@ send_alert() {
 
 # Check if container is running
 check_container_status() {
-    if docker ps --format '{{.Names}}' | grep -q "^${CONTAINER_NAME}$"; then
+    local name="${1:-$CONTAINER_NAME}"
+    if docker ps --format '{{.Names}}' | grep -q "^${name}$"; then
         echo "running"
     else
         echo "stopped"
@@ -50,7 +91,8 @@ check_container_status() {
 
 # Get container statistics
 get_container_stats() {
-    local stats=$(docker stats --no-stream --format "{{json .}}" "$CONTAINER_NAME" 2>/dev/null)
+    local name="${1:-$CONTAINER_NAME}"
+    local stats=$(docker stats --no-stream --format "{{json .}}" "$name" 2>/dev/null)
     
     if [ -z "$stats" ]; then
         echo "0,0,0"
@@ -79,11 +121,12 @@ get_container_stats() {
 
 # Check application health
 check_app_health() {
+    local name="${1:-$CONTAINER_NAME}"
     local start_time=$(date +%s%3N)
     
     # Use the container name to check health
     # Fix: Use the actual container name from the docker network
-    local response=$(curl -s -w "\n%{http_code}" http://${CONTAINER_NAME}:80/health 2>/dev/null)
+    local response=$(curl -s -w "\n%{http_code}" http://${name}:80/health 2>/dev/null)
     
     local end_time=$(date +%s%3N)
     
@@ -99,51 +142,73 @@ check_app_health() {
 
 # Main monitoring function
 monitor_container() {
-    log_message "INFO" "Starting container monitoring for $CONTAINER_NAME"
+    local name="${1:-$CONTAINER_NAME}"
+    local metrics_file=$(metrics_file_for "$name")
+    # Name-qualify messages when several containers share the logs
+    local prefix=""
+    if [ "$MULTI_CONTAINER" -eq 1 ]; then
+        prefix="[$name] "
+    fi
+    log_message "INFO" "Starting container monitoring for $name"
     
     # Check if container exists
-    if ! docker ps -a --format '{{.Names}}' | grep -q "^${CONTAINER_NAME}$"; then
-        log_message "ERROR" "Container $CONTAINER_NAME not found"
+    if ! docker ps -a --format '{{.Names}}' | grep -q "^${name}$"; then
+        log_message "ERROR" "Container $name not found"
         return 1
     fi
     
     # Check container status
-    local status=$(check_container_status)
+    local status=$(check_container_status "$name")
     if [ "$status" != "running" ]; then
-        send_alert "Container Down" "Container $CONTAINER_NAME is not running"
+        send_alert "Container Down" "Container $name is not running"
         return 1
     fi
     
-    # Get container stats
-    IFS=',' read -r cpu mem_usage_mb mem_percent <<< "$(get_container_stats)"
-    
-    # Get application health
-    IFS=',' read -r response_time app_status <<< "$(check_app_health)"
+    # Get container stats and application health at the same time
+    local stats_file=$(mktemp)
+    get_container_stats "$name" > "$stats_file" &
+    IFS=',' read -r response_time app_status <<< "$(check_app_health "$name")"
+    wait
+    IFS=',' read -r cpu mem_usage_mb mem_percent < "$stats_file"
+    rm -f "$stats_file"
     
     # Log metrics
     local timestamp=$(date '+%Y-%m-%d %H:%M:%S')
-    echo "$timestamp,$cpu,$mem_usage_mb,$mem_percent,$response_time,$app_status" >> "$METRICS_FILE"
+    initialize_metrics_file "$metrics_file"
+    echo "$timestamp,$cpu,$mem_usage_mb,$mem_percent,$response_time,$app_status" >> "$metrics_file"
     
-    log_message "INFO" "CPU: ${cpu}%, Memory: ${mem_usage_mb}MB (${mem_percent}%), Response Time: ${response_time}ms, Status: $app_status"
+    log_message "INFO" "${prefix}CPU: ${cpu}%, Memory: ${mem_usage_mb}MB (${mem_percent}%), Response Time: ${response_time}ms, Status: $app_status"
     
     # Check thresholds and send alerts
     if (( $(echo "$cpu > $CPU_THRESHOLD" | bc -l 2>/dev/null) )); then
-        send_alert "High CPU" "CPU usage is ${cpu}% (threshold: ${CPU_THRESHOLD}%)"
+        send_alert "High CPU" "${prefix}CPU usage is ${cpu}% (threshold: ${CPU_THRESHOLD}%)"
     fi
     
     if (( $(echo "$mem_percent > $MEMORY_THRESHOLD" | bc -l 2>/dev/null) )); then
-        send_alert "High Memory" "Memory usage is ${mem_percent}% (threshold: ${MEMORY_THRESHOLD}%)"
+        send_alert "High Memory" "${prefix}Memory usage is ${mem_percent}% (threshold: ${MEMORY_THRESHOLD}%)"
     fi
     
     if [ "$response_time" -gt "$RESPONSE_TIME_THRESHOLD" ]; then
-        send_alert "Slow Response" "Response time is ${response_time}ms (threshold: ${RESPONSE_TIME_THRESHOLD}ms)"
+        send_alert "Slow Response" "${prefix}Response time is ${response_time}ms (threshold: ${RESPONSE_TIME_THRESHOLD}ms)"
     fi
     
     if [ "$app_status" != "healthy" ]; then
-        send_alert "Application Unhealthy" "Application health check failed"
+        send_alert "Application Unhealthy" "${prefix}Application health check failed"
     fi
 }
 
+# Sample every target concurrently, at most MAX_PARALLEL at a time
+monitor_all() {
+    local name
+    for name in $(resolve_targets); do
+        while [ "$(jobs -rp | wc -l)" -ge "$MAX_PARALLEL" ]; do
+            wait -n
+        done
+        monitor_container "$name" &
+    done
+    wait
+}
+
 # Generate monitoring report
 generate_report() {
     local report_file="/var/log/container_report_$(date +%Y%m%d_%H%M%S).txt"
@@ -152,25 +217,30 @@ generate_report() {
         echo "Container Monitoring Report"
         echo "=========================="
         echo "Generated: $(date)"
-        echo "Container: $CONTAINER_NAME"
+        echo "Containers: $(resolve_targets | paste -sd, -)"
         echo ""
         echo "Summary Statistics:"
         echo "-------------------"
         
-        if [ -f "$METRICS_FILE" ]; then
+        local name
+        for name in $(resolve_targets); do
+            local metrics_file=$(metrics_file_for "$name")
+            [ -f "$metrics_file" ] || continue
             # Calculate averages
-            local avg_cpu=$(awk -F',' 'NR>1 {sum+=$2; count++} END {if(count>0) printf "%.2f", sum/count; else print "0"}' "$METRICS_FILE")
-            local avg_mem=$(awk -F',' 'NR>1 {sum+=$4; count++} END {if(count>0) printf "%.2f", sum/count; else print "0"}' "$METRICS_FILE")
-            local avg_response=$(awk -F',' 'NR>1 {sum+=$5; count++} END {if(count>0) printf "%.0f", sum/count; else print "0"}' "$METRICS_FILE")
+            local avg_cpu=$(awk -F',' 'NR>1 {sum+=$2; count++} END {if(count>0) printf "%.2f", sum/count; else print "0"}' "$metrics_file")
+            local avg_mem=$(awk -F',' 'NR>1 {sum+=$4; count++} END {if(count>0) printf "%.2f", sum/count; else print "0"}' "$metrics_file")
+            local avg_response=$(awk -F',' 'NR>1 {sum+=$5; count++} END {if(count>0) printf "%.0f", sum/count; else print "0"}' "$metrics_file")
             
+            echo "[$name]"
             echo "Average CPU Usage: ${avg_cpu}%"
             echo "Average Memory Usage: ${avg_mem}%"
             echo "Average Response Time: ${avg_response}ms"
             echo ""
-            echo "Recent Alerts:"
-            echo "--------------"
-            tail -10 "$ALERT_LOG" 2>/dev/null || echo "No recent alerts"
-        fi
+        done
+        
+        echo "Recent Alerts:"
+        echo "--------------"
+        tail -10 "$ALERT_LOG" 2>/dev/null || echo "No recent alerts"
     } > "$report_file"
     
     log_message "INFO" "Report generated: $report_file"
@@ -220,8 +290,11 @@ live_monitor() {
         echo "╚════════════════════════════════════════════════════════════════════╝"
         echo ""
         
+        # Detailed view is for the first target, others are summarised below
+        local primary=$(resolve_targets | head -n1)
+        
         # Check container status
-        local status=$(check_container_status)
+        local status=$(check_container_status "$primary")
         if [ "$status" != "running" ]; then
             echo "🔴 Container Status: STOPPED"
             echo ""
@@ -231,13 +304,13 @@ live_monitor() {
         fi
         
         # Get container stats
-        IFS=',' read -r cpu mem_usage_mb mem_percent <<< "$(get_container_stats)"
+        IFS=',' read -r cpu mem_usage_mb mem_percent <<< "$(get_container_stats "$primary")"
         
         # Get application health
-        IFS=',' read -r response_time app_status <<< "$(check_app_health)"
+        IFS=',' read -r response_time app_status <<< "$(check_app_health "$primary")"
         
         # Display status
-        echo "🟢 Container Status: RUNNING"
+        echo "🟢 Container Status: RUNNING ($primary)"
         echo ""
         echo "📊 Resource Usage:"
         echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
@@ -289,6 +362,19 @@ live_monitor() {
             echo "✅ All systems normal"
         fi
         
+        # Last logged sample of every container
+        if [ "$MULTI_CONTAINER" -eq 1 ]; then
+            echo ""
+            echo "📦 Containers:"
+            echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+            printf "  %-24s %8s %8s %10s  %s\n" "NAME" "CPU%" "MEM%" "RESP(ms)" "HEALTH"
+            local name
+            for name in $(resolve_targets); do
+                IFS=',' read -r _ c _ m r h <<< "$(tail -n1 "$(metrics_file_for "$name")" 2>/dev/null)"
+                printf "  %-24s %8s %8s %10s  %s\n" "$name" "$c" "$m" "$r" "$h"
+            done
+        fi
+        
         # Display recent log entries
         echo ""
         echo "📋 Recent Activity:"
@@ -300,7 +386,7 @@ live_monitor() {
         echo "Press Ctrl+C to exit"
         
         # Log metrics for monitoring
-        monitor_container
+        monitor_all
         
         # Sleep for refresh interval
         sleep 2
@@ -312,7 +398,7 @@ main() {
     case "${1:-monitor}" in
         monitor)
             initialize_logs
-            monitor_container
+            monitor_all
             ;;
         report)
             generate_report
@@ -321,7 +407,7 @@ main() {
             initialize_logs
             log_message "INFO" "Starting continuous monitoring (Ctrl+C to stop)"
             while true; do
-                monitor_container
+                monitor_all
                 sleep 60  # Check every minute
             done
             ;;
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tail readers for the append-only monitor logs.
+
+`tail_lines` seeks backwards from the end of a file in fixed blocks, so the
+cost depends on how many lines are wanted rather than the file size.
+`LogTailer` remembers the byte offset it has consumed and only parses lines
+appended since the previous call.
+"""
+import os
+import threading
+from collections import deque
+
+
+def tail_lines(path, count, block_size=8192):
+    """Return (last `count` complete lines, offset after them) by reading blocks from the end"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos = end
+        data = b''
+        while pos > 0 and data.count(b'\n') <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+    if pos > 0:
+        # The seek landed inside a line; drop that fragment
+        data = data[data.index(b'\n') + 1:]
+    # Keep an unterminated last line until the writer finishes it, so the
+    # returned offset is where a LogTailer picks it up again
+    complete = data.rfind(b'\n') + 1
+    end -= len(data) - complete
+    lines = data[:complete].decode('utf-8', errors='replace').splitlines()
+    return (lines[-count:] if count else []), end
+
+
+class LogTailer:
+    """Incremental reader that tracks the consumed byte offset of a log file"""
+
+    def __init__(self, path, block_size=8192):
+        self.path = path
+        self.block_size = block_size
+        self._offset = 0
+        self._inode = None
+        self._partial = ''
+        self._lock = threading.Lock()
+
+    def tail(self, count):
+        """Return the last `count` complete lines and continue right after them"""
+        with self._lock:
+            try:
+                lines, self._offset = tail_lines(self.path, count, self.block_size)
+                self._inode = os.stat(self.path).st_ino
+            except OSError:
+                return []
+            self._partial = ''
+            return lines
+
+    def read_new(self):
+        """Return complete lines appended since the last call"""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                return []
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                # Rotated or truncated, start over from the top
+                self._inode = st.st_ino
+                self._offset = 0
+                self._partial = ''
+            if st.st_size == self._offset:
+                return []
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read(st.st_size - self._offset)
+            self._offset += len(chunk)
+            lines = (self._partial + chunk.decode('utf-8', errors='replace')).split('\n')
+            # Keep an unterminated last line until the writer finishes it
+            self._partial = lines.pop()
+            return lines
+
+
+class RecentLines:
+    """Keeps the newest non-empty lines of a log, fed by a LogTailer"""
+
+    def __init__(self, path, count):
+        self.tailer = LogTailer(path)
+        self.lines = deque(maxlen=count)
+        # Total lines ever added, used as a cursor by stream readers
+        self.seq = 0
+        self._lock = threading.Lock()
+
+    def seed(self):
+        with self._lock:
+            self.lines.clear()
+            self._extend(self.tailer.tail(self.lines.maxlen))
+
+    def poll(self):
+        """Append new lines and return only the ones added by this call"""
+        with self._lock:
+            return self._extend(self.tailer.read_new())
+
+    def recent(self):
+        self.poll()
+        return list(self.lines)
+
+    def since(self, seq):
+        """Return (lines added after cursor `seq` still held, new cursor)"""
+        with self._lock:
+            count = min(self.seq - seq, len(self.lines))
+            return list(self.lines)[len(self.lines) - count:], self.seq
+
+    def _extend(self, lines):
+        added = [line.strip() for line in lines if line.strip()]
+        self.lines.extend(added)
+        self.seq += len(added)
+        return added
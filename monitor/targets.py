@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Which containers the monitor tracks.
+
+Targets come from CONTAINER_LABEL (a Docker label selector such as
+`app=heavy`, re-resolved periodically) or CONTAINER_NAMES (comma separated),
+falling back to the single CONTAINER_NAME.
+
+HEALTH_TARGETS (comma separated) names the application containers that get
+the HTTP health probe and the CPU, memory and response time thresholds;
+unset, every target does. Any other target, a database say, is sampled for
+resources and reports its Docker healthcheck status, if it defines one.
+"""
+import os
+
+from docker_stats import list_containers
+
+CONTAINER_NAME = os.getenv('CONTAINER_NAME', 'monitored-app')
+CONTAINER_NAMES = [n.strip() for n in os.getenv('CONTAINER_NAMES', '').split(',') if n.strip()]
+CONTAINER_LABEL = os.getenv('CONTAINER_LABEL', '')
+HEALTH_TARGETS = [n.strip() for n in os.getenv('HEALTH_TARGETS', '').split(',') if n.strip()]
+LOG_DIR = os.getenv('LOG_DIR', '/var/log')
+METRICS_FILE = os.path.join(LOG_DIR, 'container_metrics.csv')
+
+# With more than one possible target every container gets its own CSV
+MULTI_CONTAINER = bool(CONTAINER_LABEL) or len(CONTAINER_NAMES) > 1
+
+
+def resolve_targets():
+    """Return the current list of container names to monitor"""
+    if CONTAINER_LABEL:
+        return sorted(list_containers(label=CONTAINER_LABEL))
+    return CONTAINER_NAMES or [CONTAINER_NAME]
+
+
+def is_app_target(name):
+    """Whether a container is probed over HTTP and held to the app thresholds"""
+    return not HEALTH_TARGETS or name in HEALTH_TARGETS
+
+
+def metrics_file_for(name):
+    """Path of the metrics CSV for one container"""
+    if not MULTI_CONTAINER:
+        return METRICS_FILE
+    return os.path.join(LOG_DIR, f'container_metrics_{name}.csv')
@@ -0,0 +1,27 @@
+from tailer import LogTailer, tail_lines
+
+
+def test_tail_drops_fragment_after_mid_line_seek(tmp_path):
+    path = tmp_path / 'alerts.log'
+    path.write_text(''.join(f"line {i:04d}\n" for i in range(100)))
+    # Blocks of 7 bytes never start on a line boundary (lines are 10 bytes)
+    lines, end = tail_lines(str(path), 3, block_size=7)
+    assert lines == ['line 0097', 'line 0098', 'line 0099']
+    assert end == path.stat().st_size
+
+    lines, _ = tail_lines(str(path), 100, block_size=7)
+    assert lines == [f"line {i:04d}" for i in range(100)]
+
+
+def test_tail_holds_back_unterminated_last_line(tmp_path):
+    path = tmp_path / 'metrics.csv'
+    path.write_text('a\nb\npart')
+    lines, end = tail_lines(str(path), 5)
+    assert lines == ['a', 'b']
+    assert end == len('a\nb\n')
+
+    tailer = LogTailer(str(path))
+    assert tailer.tail(5) == ['a', 'b']
+    with open(path, 'a') as f:
+        f.write('ial\n')
+    assert tailer.read_new() == ['partial']
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Saturation search for the stress generator's benchmark mode.
+
+Offered load is stepped up in open loop, holding each rate for a while.
+Every step is checked against an SLO: a p99 latency limit and a maximum
+failure rate, where failures count transport errors, 5xx responses and
+sends dropped at the in-flight cap. The run reports the highest rate that
+met the SLO (maximum sustainable throughput) and the knee, the last rate
+before p99 climbed past a multiple of its low-load value. Container CPU
+and memory are polled from the monitor's /api/stats during each step, so
+throughput can be read against resource use.
+"""
+import threading
+
+import requests
+
+
+def step_rates(start, step, maximum):
+    """Offered rates to try: start, start + step, ... up to maximum"""
+    rate = start
+    while rate <= maximum:
+        yield rate
+        rate += step
+
+
+class ResourceSampler:
+    """Polls the monitor's /api/stats for each container until stopped"""
+
+    def __init__(self, monitor_url, containers, interval):
+        self.monitor_url = monitor_url.rstrip('/')
+        # None asks the monitor for its default container
+        self.containers = containers or [None]
+        self.interval = interval
+        self._samples = {name: [] for name in self.containers}
+        self._errors = {name: 0 for name in self.containers}
+        self._last_error = {}
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='resource-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        with requests.Session() as session:
+            while True:
+                for name in self.containers:
+                    self._sample(session, name)
+                if self._stopped.wait(self.interval):
+                    return
+
+    def _sample(self, session, name):
+        params = {'container': name} if name is not None else None
+        try:
+            response = session.get(f"{self.monitor_url}/api/stats", params=params, timeout=5)
+            if response.status_code == 404:
+                self._fail(name, "not monitored (404): add it to the monitor's CONTAINER_NAMES")
+                return
+            response.raise_for_status()
+            stats = response.json()
+        except (requests.RequestException, ValueError) as e:
+            self._fail(name, str(e))
+            return
+        if stats.get('status') == 'running':
+            self._samples[name].append(stats)
+
+    def _fail(self, name, error):
+        if self._last_error.get(name) != error:
+            # Once per distinct error, not once per poll
+            print(f"Resource sampling for {name or 'default container'} failed: {error}")
+        self._errors[name] += 1
+        self._last_error[name] = error
+
+    def stop(self):
+        """Stop polling; returns CPU/memory per container over the samples taken"""
+        self._stopped.set()
+        self._thread.join()
+        resources = {}
+        for name, samples in self._samples.items():
+            cpu = [s['cpu'] for s in samples]
+            resources[name or 'default'] = {
+                'samples': len(samples),
+                'cpu_avg': round(sum(cpu) / len(cpu), 2) if cpu else None,
+                'cpu_max': max(cpu) if cpu else None,
+                'memory_used_max_mb': max((s['memory_used'] for s in samples), default=None),
+                'memory_percent_max': max((s['memory_percent'] for s in samples), default=None),
+                'errors': self._errors[name],
+                'last_error': self._last_error.get(name)
+            }
+        return resources
+
+
+def evaluate(offered_rps, summary, open_loop, slo_p99_ms, slo_error_rate):
+    """SLO verdict for one step from its cycle summary and open-loop stats"""
+    dropped = (open_loop or {}).get('dropped', 0)
+    server_errors = sum(n for code, n in summary['status_codes'].items() if code.startswith('5'))
+    successes = summary['requests'] - sum(summary['errors'].values()) - server_errors
+    attempts = summary['requests'] + dropped
+    failures = attempts - successes
+    error_rate = failures / attempts if attempts else 0
+    p99 = summary['latency']['p99_ms']
+    elapsed = summary['elapsed_s']
+    reasons = []
+    if p99 is not None and p99 > slo_p99_ms:
+        reasons.append(f"p99 {p99} ms > {slo_p99_ms} ms")
+    if error_rate > slo_error_rate:
+        reasons.append(f"failure rate {error_rate:.2%} > {slo_error_rate:.2%}")
+    if not attempts:
+        reasons.append("no requests completed")
+    return {
+        'offered_rps': offered_rps,
+        'throughput_rps': summary['rps'],
+        # Successful responses per second
+        'goodput_rps': round(successes / elapsed, 2) if elapsed else None,
+        'p50_ms': summary['latency']['p50_ms'],
+        'p99_ms': p99,
+        'max_ms': summary['latency']['max_ms'],
+        'failure_rate': round(error_rate, 4),
+        'passed': not reasons,
+        'violations': reasons
+    }
+
+
+def conclude(steps, slo_p99_ms, slo_error_rate, knee_factor):
+    """Maximum sustainable throughput and knee over the evaluated steps"""
+    passed = [step for step in steps if step['slo']['passed']]
+    failed = [step for step in steps if not step['slo']['passed']]
+    knee = None
+    baseline = next((step['slo']['p99_ms'] for step in steps if step['slo']['p99_ms']), None)
+    if baseline:
+        for step in steps:
+            if step['slo']['p99_ms'] is not None and step['slo']['p99_ms'] > baseline * knee_factor:
+                break
+            knee = step
+    best = max(passed, key=lambda step: step['slo']['goodput_rps'] or 0, default=None)
+    return {
+        'slo': {'p99_ms': slo_p99_ms, 'failure_rate': slo_error_rate},
+        'steps': len(steps),
+        'max_sustainable_rps': best['slo']['goodput_rps'] if best else None,
+        'max_passing_offered_rps': max((step['slo']['offered_rps'] for step in passed), default=None),
+        'first_failing_offered_rps': failed[0]['slo']['offered_rps'] if failed else None,
+        'knee_offered_rps': knee['slo']['offered_rps'] if knee else None,
+        'knee_p99_ms': knee['slo']['p99_ms'] if knee else None,
+        'baseline_p99_ms': baseline,
+        'resources_at_max': best.get('resources') if best else None,
+        'curve': [{'offered_rps': step['slo']['offered_rps'], 'goodput_rps': step['slo']['goodput_rps'],
+                   'p99_ms': step['slo']['p99_ms'], 'failure_rate': step['slo']['failure_rate'],
+                   'passed': step['slo']['passed'], 'resources': step.get('resources')}
+                  for step in steps]
+    }
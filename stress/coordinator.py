@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Coordinator/worker plumbing for spreading one load test over several
+generator processes or containers, each with its own interpreter and GIL.
+
+Workers connect to the coordinator over TCP and exchange newline-delimited
+JSON messages. For every cycle the coordinator sends each worker a `run`
+message carrying a shared wall-clock start time and the worker's slice
+(`index` of `workers`). Each worker answers with a `result` holding its
+recorder state, and the coordinator merges them into one report. Workers
+on other hosts start in sync only as far as the hosts' clocks agree.
+"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Lead time between sending `run` and the shared start
+START_DELAY = 2.0
+CONNECT_RETRY = 1.0
+HELLO_TIMEOUT = 5.0
+
+
+class Channel:
+    """One JSON-lines connection to a worker or to the coordinator"""
+
+    def __init__(self, sock, name):
+        self.sock = sock
+        self.name = name
+        self._file = sock.makefile('rw', encoding='utf-8', newline='\n')
+
+    def send(self, message):
+        self._file.write(json.dumps(message) + '\n')
+        self._file.flush()
+
+    def receive(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError(f"{self.name} disconnected")
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            # Truncated or garbled: the stream can no longer be trusted
+            raise ConnectionError(f"{self.name} sent a malformed message")
+
+    def close(self):
+        for closeable in (self._file, self.sock):
+            try:
+                closeable.close()
+            except OSError:
+                pass
+
+
+class Coordinator:
+    """Accepts worker connections and runs cycles across all of them"""
+
+    def __init__(self, port, bind='127.0.0.1'):
+        self._server = socket.create_server((bind, port))
+        self.port = self._server.getsockname()[1]
+        self.workers = []
+
+    def accept(self, expected, timeout):
+        """Wait up to `timeout` s for `expected` workers; returns how many are connected"""
+        deadline = time.time() + timeout
+        while len(self.workers) < expected:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            self._server.settimeout(remaining)
+            try:
+                sock, address = self._server.accept()
+            except socket.timeout:
+                break
+            self._register(sock, address)
+        return len(self.workers)
+
+    def accept_pending(self):
+        """Register workers that connected since the last cycle, without waiting"""
+        self._server.settimeout(0)
+        while True:
+            try:
+                sock, address = self._server.accept()
+            except (BlockingIOError, socket.timeout):
+                return
+            self._register(sock, address)
+
+    def _register(self, sock, address):
+        sock.settimeout(HELLO_TIMEOUT)
+        channel = Channel(sock, f"{address[0]}:{address[1]}")
+        try:
+            hello = channel.receive()
+        except (OSError, ValueError) as e:
+            print(f"Ignoring connection from {channel.name}: {e}")
+            channel.close()
+            return
+        # Cycles can run for as long as the scenario or level takes
+        sock.settimeout(None)
+        channel.name = hello.get('worker') or channel.name
+        self.workers.append(channel)
+        print(f"Worker {channel.name} connected ({len(self.workers)} total)")
+
+    def _drop(self, channel, error):
+        print(f"Worker {channel.name} lost: {error}")
+        channel.close()
+        if channel in self.workers:
+            self.workers.remove(channel)
+
+    def run_cycle(self, message, timeout):
+        """Start `message` on every worker at one shared time; returns their results.
+
+        A worker that has not answered within `timeout` s of the start is
+        dropped, like one that disconnects. It appears in the results as
+        {'worker': name, 'error': reason}, so the cycle still reports.
+        """
+        workers = list(self.workers)
+        start_at = time.time() + START_DELAY
+        deadline = start_at + timeout
+        results = []
+        for index, channel in enumerate(workers):
+            try:
+                channel.send({**message, 'type': 'run', 'index': index,
+                              'workers': len(workers), 'start_at': start_at})
+            except OSError as e:
+                self._drop(channel, e)
+                results.append({'worker': channel.name, 'error': str(e)})
+        for channel in workers:
+            if channel not in self.workers:
+                continue
+            try:
+                channel.sock.settimeout(max(deadline - time.time(), 0.001))
+                results.append({**channel.receive(), 'worker': channel.name})
+                channel.sock.settimeout(None)
+            except socket.timeout:
+                error = f"no result within {timeout:g}s of the start"
+                self._drop(channel, error)
+                results.append({'worker': channel.name, 'error': error})
+            except (OSError, ValueError) as e:
+                self._drop(channel, e)
+                results.append({'worker': channel.name, 'error': str(e)})
+        return results
+
+    def close(self):
+        for channel in self.workers:
+            try:
+                channel.send({'type': 'stop'})
+            except OSError:
+                pass
+            channel.close()
+        self.workers = []
+        self._server.close()
+
+
+def connect(address, timeout):
+    """Channel to the coordinator at host:port, retrying for up to `timeout` s"""
+    host, port = address.rsplit(':', 1)
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return Channel(socket.create_connection((host, int(port))), address)
+        except OSError:
+            if time.time() >= deadline:
+                raise
+            time.sleep(CONNECT_RETRY)
+
+
+def wait_until(start_at):
+    time.sleep(max(start_at - time.time(), 0))
+
+
+def spawn_local_workers(count, address, script):
+    """Start `count` copies of `script` as workers of the coordinator at `address`"""
+    return [
+        subprocess.Popen([sys.executable, script], env={
+            **os.environ, 'ROLE': 'worker', 'COORDINATOR_ADDR': address, 'WORKER_ID': f"local-{i}"
+        })
+        for i in range(count)
+    ]
+
+
+def stop_local_workers(processes, timeout=10):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
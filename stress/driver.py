@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Load-generation driver shared by the stress generators.
+
+stress/stress_app.py (nginx) and Heavy-App/stress_app.py (the Flask app)
+only define their stress levels, endpoints and request timeout, and call
+main(). Everything else lives here: the threads and async engines, cycle
+and interval reports, scenarios, coordinator/worker runs and benchmark
+mode, all configured from the environment.
+"""
+import asyncio
+import math
+import os
+import time
+import requests
+import socket
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+
+import benchmark
+import coordinator
+import open_loop
+import report
+import scenario
+
+TARGET_URL = os.getenv('TARGET_URL', 'http://web-app')
+STRESS_LEVEL = os.getenv('STRESS_LEVEL', 'low')
+# 'keepalive': one Session per load thread, reusing its connection;
+# 'per-request': a new TCP connection for every request, for comparison
+CONNECTION_MODE = os.getenv('CONNECTION_MODE', 'keepalive')
+CONNECTION_MODES = ('keepalive', 'per-request')
+# 'threads': closed loop, each thread waits for its response then sleeps;
+# 'async': open loop at TARGET_RPS (default: the level's 'rate') with
+# ARRIVAL spacing ('constant' or 'poisson'), see open_loop.py
+ENGINE = os.getenv('ENGINE', 'threads')
+ENGINES = ('threads', 'async')
+ARRIVAL = os.getenv('ARRIVAL', 'constant')
+TARGET_RPS = os.getenv('TARGET_RPS')
+# Open-loop cycle length; defaults to the time the level's request count takes at its rate
+CYCLE_SECONDS = os.getenv('CYCLE_SECONDS')
+MAX_IN_FLIGHT = int(os.getenv('MAX_IN_FLIGHT', '10000'))
+# Each cycle ends with a JSON report (latency percentiles, status codes,
+# errors and rps per endpoint); REPORT_INTERVAL > 0 adds interval snapshots
+# every that many seconds, and REPORT_FILE also appends them as JSON lines
+REPORT_INTERVAL = float(os.getenv('REPORT_INTERVAL', '0'))
+REPORT_FILE = os.getenv('REPORT_FILE')
+# One line per request; costly at high levels, so off unless asked for
+LOG_REQUESTS = os.getenv('LOG_REQUESTS', '0') == '1'
+# YAML/JSON workload with weighted endpoints and ramp stages (see
+# scenario.py); replaces STRESS_LEVEL when set
+SCENARIO_FILE = os.getenv('SCENARIO_FILE')
+# How often an idle scenario user checks whether its stage needs it
+USER_POLL = 0.1
+# 'standalone' generates the load in this process. 'coordinator' splits it
+# across LOCAL_WORKERS worker processes plus REMOTE_WORKERS containers run
+# with ROLE=worker and COORDINATOR_ADDR=<coordinator host>:COORDINATOR_PORT,
+# starts every cycle on all of them at once and merges their reports
+ROLE = os.getenv('ROLE', 'standalone')
+ROLES = ('standalone', 'coordinator', 'worker')
+LOCAL_WORKERS = int(os.getenv('LOCAL_WORKERS', str(len(os.sched_getaffinity(0)))))
+REMOTE_WORKERS = int(os.getenv('REMOTE_WORKERS', '0'))
+COORDINATOR_PORT = int(os.getenv('COORDINATOR_PORT', '7070'))
+COORDINATOR_ADDR = os.getenv('COORDINATOR_ADDR', f"127.0.0.1:{COORDINATOR_PORT}")
+WORKER_ID = os.getenv('WORKER_ID', socket.gethostname())
+# How long the coordinator waits for its workers, and workers for the coordinator
+WORKER_WAIT = float(os.getenv('WORKER_WAIT', '60'))
+# Slack past a cycle's expected length before the coordinator gives up on
+# a worker's result and reports the cycle without it
+CYCLE_GRACE = float(os.getenv('CYCLE_GRACE', '30'))
+# 'load' repeats cycles forever; 'benchmark' steps open-loop load from
+# BENCH_START_RPS by BENCH_STEP_RPS, holding each for BENCH_STEP_SECONDS,
+# until BENCH_FAILURES steps in a row miss the SLO (p99 over SLO_P99_MS or
+# failure rate over SLO_ERROR_RATE), then reports the sustainable maximum
+# and exits. With MONITOR_URL set, each step also samples /api/stats there
+# for MONITOR_CONTAINERS (comma separated; default: the monitor's own)
+MODE = os.getenv('MODE', 'load')
+MODES = ('load', 'benchmark')
+BENCH_START_RPS = float(os.getenv('BENCH_START_RPS', '10'))
+BENCH_STEP_RPS = float(os.getenv('BENCH_STEP_RPS', '10'))
+BENCH_MAX_RPS = float(os.getenv('BENCH_MAX_RPS', '10000'))
+BENCH_STEP_SECONDS = float(os.getenv('BENCH_STEP_SECONDS', '30'))
+BENCH_FAILURES = int(os.getenv('BENCH_FAILURES', '2'))
+SLO_P99_MS = float(os.getenv('SLO_P99_MS', '1000'))
+SLO_ERROR_RATE = float(os.getenv('SLO_ERROR_RATE', '0.01'))
+# The knee is the last step before p99 exceeds this multiple of the first step's
+KNEE_FACTOR = float(os.getenv('KNEE_FACTOR', '2'))
+MONITOR_URL = os.getenv('MONITOR_URL')
+MONITOR_CONTAINERS = [n.strip() for n in os.getenv('MONITOR_CONTAINERS', '').split(',') if n.strip()]
+MONITOR_POLL = float(os.getenv('MONITOR_POLL', '2'))
+
+# Supplied by the entry script through main(): its stress levels, a
+# choose_endpoint(config) -> (report name, path) function, the request
+# timeout, and its own path so local workers can be spawned from it
+STRESS_CONFIGS = {}
+choose_endpoint = None
+REQUEST_TIMEOUT = 5
+SCRIPT = None
+
+def new_session():
+    """Session holding one keep-alive connection; each load thread sends one request at a time"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def generate_load(thread_id, config, recorder):
+    """Generate load on the target application"""
+    # requests.get() opens and closes its own connection every call
+    session = new_session() if CONNECTION_MODE == 'keepalive' else requests
+    try:
+        send_requests(thread_id, config, session, recorder)
+    finally:
+        if session is not requests:
+            session.close()
+
+def send_requests(thread_id, config, session, recorder):
+    for i in range(config['requests_per_thread']):
+        name, endpoint = choose_endpoint(config)
+        send_one(thread_id, i, session, name, endpoint, recorder)
+        time.sleep(config['delay'])
+
+def send_one(thread_id, i, session, name, endpoint, recorder):
+    """GET one endpoint, recording it under `name`"""
+    started = time.perf_counter()
+    try:
+        response = session.get(f"{TARGET_URL}{endpoint}", timeout=REQUEST_TIMEOUT)
+        recorder.record(name, time.perf_counter() - started, status=response.status_code)
+        if LOG_REQUESTS:
+            print(f"Thread {thread_id}: Request {i+1} to {endpoint} - Status: {response.status_code}")
+    except Exception as e:
+        recorder.record(name, time.perf_counter() - started, error=type(e).__name__)
+        if LOG_REQUESTS:
+            print(f"Thread {thread_id}: Error - {str(e)}")
+
+def scenario_user(user_id, plan, started, recorder):
+    """One scenario user: sends while its stage needs at least user_id + 1 users"""
+    session = new_session() if CONNECTION_MODE == 'keepalive' else requests
+    try:
+        i = 0
+        while True:
+            elapsed = time.monotonic() - started
+            if elapsed >= plan.duration:
+                break
+            if user_id >= plan.target_at(elapsed, 'users'):
+                time.sleep(USER_POLL)
+                continue
+            name, endpoint = plan.choose()
+            send_one(user_id, i, session, name, endpoint, recorder)
+            i += 1
+            time.sleep(plan.think_time())
+    finally:
+        if session is not requests:
+            session.close()
+
+def run_thread_cycle(config, recorder, index=0, workers=1):
+    """One closed-loop cycle: every thread sends its requests_per_thread"""
+    # With several workers, each runs every workers-th thread
+    thread_ids = range(index, config['threads'], workers)
+    if not thread_ids:
+        return
+    with ThreadPoolExecutor(max_workers=len(thread_ids)) as executor:
+        futures = []
+        for i in thread_ids:
+            future = executor.submit(generate_load, i, config, recorder)
+            futures.append(future)
+        
+        # Wait for all threads to complete
+        for future in futures:
+            future.result()
+
+def run_scenario_threads(plan, recorder, index=0, workers=1):
+    """Closed-loop scenario: one thread per user at the busiest stage"""
+    user_ids = range(index, math.ceil(plan.max_target('users')), workers)
+    if not user_ids:
+        return
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=len(user_ids)) as executor:
+        futures = [executor.submit(scenario_user, i, plan, started, recorder) for i in user_ids]
+        for future in futures:
+            future.result()
+
+def run_open_loop(next_endpoint, rate, duration, recorder):
+    stats = asyncio.run(open_loop.run(
+        TARGET_URL, next_endpoint, rate, duration, recorder,
+        arrival=ARRIVAL, max_in_flight=MAX_IN_FLIGHT, timeout=REQUEST_TIMEOUT,
+        keepalive=CONNECTION_MODE == 'keepalive', log_requests=LOG_REQUESTS
+    ))
+    return {'open_loop': stats}
+
+def open_loop_schedule(config, target_rps, cycle_seconds):
+    """(rate, duration) of an open-loop cycle: the overrides, else the level's"""
+    rate = float(target_rps or config['rate'])
+    duration = float(cycle_seconds or config['threads'] * config['requests_per_thread'] / rate)
+    return rate, duration
+
+def run_open_loop_cycle(config, recorder, workers=1):
+    """One open-loop cycle on the async engine; returns its scheduling stats"""
+    rate, duration = open_loop_schedule(config, TARGET_RPS, CYCLE_SECONDS)
+    rate /= workers
+    print(f"Open-loop cycle: {rate:g} req/s ({ARRIVAL}) for {duration:.0f}s")
+    return run_open_loop(lambda: choose_endpoint(config), rate, duration, recorder)
+
+def emit_report(kind, cycle, summary, extra=None, plan=None):
+    workload = {'scenario': plan.name} if plan is not None else {'level': STRESS_LEVEL}
+    if ROLE == 'worker':
+        # Workers only print their interval reports; the coordinator writes the file
+        report.emit({'type': kind, 'worker': WORKER_ID, 'cycle': cycle, **workload,
+                     'engine': ENGINE, **summary, **(extra or {})})
+        return
+    report.emit({'type': kind, 'cycle': cycle, **workload, 'engine': ENGINE,
+                 **summary, **(extra or {})}, REPORT_FILE)
+
+def scenario_progress(plan, started):
+    """Stage and current users/rate for interval reports"""
+    elapsed = time.time() - started
+    stage = plan.stage_at(elapsed)
+    target = 'rate' if ENGINE == 'async' else 'users'
+    return {'stage': stage.name if stage is not None else None,
+            target: round(plan.target_at(elapsed, target), 2)}
+
+def start_interval_reports(cycle, plan, recorder):
+    """IntervalReporter for this cycle, or None when REPORT_INTERVAL is off"""
+    if REPORT_INTERVAL <= 0:
+        return None
+
+    def emit_interval(summary):
+        extra = scenario_progress(plan, recorder.started) if plan is not None else None
+        emit_report('interval', cycle, summary, extra, plan)
+
+    return report.IntervalReporter(recorder, REPORT_INTERVAL, emit_interval).start()
+
+def execute_cycle(config, plan, recorder, index=0, workers=1):
+    """Send this process's share (index of workers) of one cycle; returns engine stats"""
+    if plan is not None and ENGINE == 'async':
+        return run_open_loop(plan.choose, lambda elapsed: plan.target_at(elapsed, 'rate') / workers,
+                             plan.duration, recorder)
+    if plan is not None:
+        return run_scenario_threads(plan, recorder, index, workers)
+    if ENGINE == 'async':
+        return run_open_loop_cycle(config, recorder, workers)
+    return run_thread_cycle(config, recorder, index, workers)
+
+def run_cycle(cycle, config, plan=None):
+    """Run one cycle (of the level, or of the whole scenario) and emit its reports"""
+    recorder = report.Recorder()
+    reporter = start_interval_reports(cycle, plan, recorder)
+    try:
+        extra = execute_cycle(config, plan, recorder)
+    finally:
+        if reporter is not None:
+            reporter.stop()
+    emit_report('cycle', cycle, recorder.cycle_report(), extra, plan)
+
+def merge_worker_stats(results):
+    """Per-worker engine stats, plus open-loop totals when the async engine ran"""
+    failed = [r['worker'] for r in results if 'error' in r]
+    extra = {'workers': len(results) - len(failed),
+             'worker_stats': [{'worker': r['worker'], **(r.get('extra') or {}),
+                               **({'error': r['error']} if 'error' in r else {})} for r in results]}
+    if failed:
+        # Their requests are missing from this cycle's totals
+        extra['failed_workers'] = failed
+    open_loops = [r['extra']['open_loop'] for r in results if (r.get('extra') or {}).get('open_loop')]
+    if open_loops:
+        extra['open_loop'] = {key: round(sum(stats[key] for stats in open_loops), 2)
+                              for key in ('offered_rps', 'scheduled', 'dropped', 'late_sends')}
+    return extra
+
+def cycle_timeout(config, scenario_spec, target_rps, cycle_seconds):
+    """Longest one worker's share of a cycle should take, plus CYCLE_GRACE"""
+    if scenario_spec:
+        duration = scenario.Scenario(scenario_spec).duration + REQUEST_TIMEOUT
+    elif ENGINE == 'async':
+        duration = open_loop_schedule(config, target_rps, cycle_seconds)[1] + REQUEST_TIMEOUT
+    else:
+        # Closed loop: every request waits at most its timeout, then the delay
+        duration = config['requests_per_thread'] * (REQUEST_TIMEOUT + config['delay'])
+    return duration + CYCLE_GRACE
+
+def run_distributed_cycle(server, cycle, config, scenario_spec, target_rps, cycle_seconds):
+    """One cycle on every connected worker; returns the merged summary and worker stats"""
+    server.accept_pending()
+    if not server.workers:
+        raise SystemExit("All workers disconnected")
+    results = server.run_cycle({
+        'cycle': cycle, 'target_url': TARGET_URL, 'level': STRESS_LEVEL, 'config': config,
+        'scenario': scenario_spec, 'engine': ENGINE, 'arrival': ARRIVAL,
+        'connection_mode': CONNECTION_MODE, 'target_rps': target_rps, 'cycle_seconds': cycle_seconds
+    }, cycle_timeout(config, scenario_spec, target_rps, cycle_seconds))
+    summary = report.merge_states([r['recorder'] for r in results if r.get('recorder')])
+    return summary, merge_worker_stats(results)
+
+def run_step(rate, config, plan, server=None):
+    """Hold `rate` req/s open loop for BENCH_STEP_SECONDS; returns (summary, engine stats)"""
+    if server is not None:
+        # Workers get a one-stage scenario, or the level with rate and duration set
+        scenario_spec = None
+        if plan is not None:
+            scenario_spec = {**plan.spec, 'stages': [
+                {'name': f"{rate:g} rps", 'duration': BENCH_STEP_SECONDS, 'rate': rate, 'ramp': 'step'}
+            ]}
+        return run_distributed_cycle(server, 0, config, scenario_spec, rate, BENCH_STEP_SECONDS)
+    recorder = report.Recorder()
+    next_endpoint = plan.choose if plan is not None else lambda: choose_endpoint(config)
+    extra = run_open_loop(next_endpoint, rate, BENCH_STEP_SECONDS, recorder)
+    return recorder.cycle_report(), extra
+
+def run_benchmark(config, plan, server=None):
+    """Step the offered load up until the SLO breaks, then report the saturation point"""
+    steps = []
+    failures = 0
+    for rate in benchmark.step_rates(BENCH_START_RPS, BENCH_STEP_RPS, BENCH_MAX_RPS):
+        print(f"Benchmark step {len(steps) + 1}: {rate:g} req/s for {BENCH_STEP_SECONDS:g}s")
+        sampler = None
+        if MONITOR_URL:
+            sampler = benchmark.ResourceSampler(MONITOR_URL, MONITOR_CONTAINERS, MONITOR_POLL).start()
+        try:
+            summary, extra = run_step(rate, config, plan, server)
+        finally:
+            resources = sampler.stop() if sampler is not None else None
+        step = {
+            **summary, **extra,
+            'slo': benchmark.evaluate(rate, summary, extra.get('open_loop'), SLO_P99_MS, SLO_ERROR_RATE),
+            'resources': resources
+        }
+        steps.append(step)
+        emit_report('benchmark-step', len(steps), step, plan=plan)
+        failures = 0 if step['slo']['passed'] else failures + 1
+        if failures >= BENCH_FAILURES:
+            break
+    emit_report('benchmark', len(steps),
+                benchmark.conclude(steps, SLO_P99_MS, SLO_ERROR_RATE, KNEE_FACTOR), plan=plan)
+
+def run_coordinator(config, plan):
+    """Spread every cycle over the workers and emit one merged report per cycle"""
+    server = coordinator.Coordinator(COORDINATOR_PORT, '0.0.0.0' if REMOTE_WORKERS else '127.0.0.1')
+    local = coordinator.spawn_local_workers(LOCAL_WORKERS, f"127.0.0.1:{server.port}",
+                                            SCRIPT)
+    try:
+        expected = LOCAL_WORKERS + REMOTE_WORKERS
+        connected = server.accept(expected, WORKER_WAIT)
+        if not connected:
+            raise SystemExit(f"No workers connected within {WORKER_WAIT:g}s")
+        if connected < expected:
+            print(f"Only {connected} of {expected} workers connected, starting anyway")
+        if MODE == 'benchmark':
+            run_benchmark(config, plan, server)
+            return
+        cycle = 0
+        while True:
+            cycle += 1
+            summary, extra = run_distributed_cycle(
+                server, cycle, config, plan.spec if plan is not None else None,
+                TARGET_RPS, CYCLE_SECONDS
+            )
+            emit_report('cycle', cycle, summary, extra, plan)
+            
+            print("Completed cycle. Waiting 10 seconds before next cycle...")
+            time.sleep(10)
+    finally:
+        server.close()
+        coordinator.stop_local_workers(local)
+
+def run_worker():
+    """Run cycles as the coordinator's `run` messages say, until it stops or goes away"""
+    global TARGET_URL, STRESS_LEVEL, ENGINE, ARRIVAL, CONNECTION_MODE, TARGET_RPS, CYCLE_SECONDS
+    channel = coordinator.connect(COORDINATOR_ADDR, WORKER_WAIT)
+    channel.send({'type': 'hello', 'worker': WORKER_ID})
+    print(f"Worker {WORKER_ID} connected to coordinator at {COORDINATOR_ADDR}")
+    try:
+        while True:
+            message = channel.receive()
+            if message['type'] == 'stop':
+                break
+            TARGET_URL = message['target_url']
+            STRESS_LEVEL = message['level']
+            ENGINE = message['engine']
+            ARRIVAL = message['arrival']
+            CONNECTION_MODE = message['connection_mode']
+            TARGET_RPS = message['target_rps']
+            CYCLE_SECONDS = message['cycle_seconds']
+            plan = scenario.Scenario(message['scenario']) if message['scenario'] else None
+            coordinator.wait_until(message['start_at'])
+            recorder = report.Recorder()
+            reporter = start_interval_reports(message['cycle'], plan, recorder)
+            try:
+                extra = execute_cycle(message['config'], plan, recorder,
+                                      message['index'], message['workers'])
+            except Exception as e:
+                print(f"Worker {WORKER_ID}: cycle error - {e}")
+                extra = {'error': str(e)}
+            finally:
+                if reporter is not None:
+                    reporter.stop()
+            channel.send({'type': 'result', 'cycle': message['cycle'],
+                          'recorder': recorder.cycle_state(), 'extra': extra})
+    except ConnectionError as e:
+        print(f"Worker {WORKER_ID}: {e}")
+    finally:
+        channel.close()
+
+def main(stress_configs, endpoint_chooser, request_timeout, script):
+    """Run the generator with the entry script's levels, endpoints and timeout"""
+    global STRESS_CONFIGS, choose_endpoint, REQUEST_TIMEOUT, SCRIPT
+    global CONNECTION_MODE, ENGINE, ARRIVAL, ROLE, MODE
+    STRESS_CONFIGS = stress_configs
+    choose_endpoint = endpoint_chooser
+    REQUEST_TIMEOUT = request_timeout
+    SCRIPT = os.path.abspath(script)
+    if ROLE == 'worker':
+        run_worker()
+        return
+    config = STRESS_CONFIGS.get(STRESS_LEVEL, STRESS_CONFIGS['low'])
+    if ROLE not in ROLES:
+        print(f"Unknown ROLE {ROLE!r}, using 'standalone'")
+        ROLE = 'standalone'
+    if CONNECTION_MODE not in CONNECTION_MODES:
+        print(f"Unknown CONNECTION_MODE {CONNECTION_MODE!r}, using 'keepalive'")
+        CONNECTION_MODE = 'keepalive'
+    if ENGINE not in ENGINES:
+        print(f"Unknown ENGINE {ENGINE!r}, using 'threads'")
+        ENGINE = 'threads'
+    if ARRIVAL not in open_loop.ARRIVALS:
+        print(f"Unknown ARRIVAL {ARRIVAL!r}, using 'constant'")
+        ARRIVAL = 'constant'
+    if MODE not in MODES:
+        print(f"Unknown MODE {MODE!r}, using 'load'")
+        MODE = 'load'
+    if MODE == 'benchmark' and ENGINE != 'async':
+        # Closed-loop load backs off as the target slows, hiding saturation
+        print("MODE=benchmark steps open-loop load, using ENGINE=async")
+        ENGINE = 'async'
+    if MODE == 'benchmark' and open_loop.aiohttp is None:
+        raise SystemExit("MODE=benchmark needs aiohttp installed")
+    if ENGINE == 'async' and open_loop.aiohttp is None:
+        print("ENGINE=async needs aiohttp installed, using 'threads'")
+        ENGINE = 'threads'
+    plan = None
+    if SCENARIO_FILE:
+        try:
+            plan = scenario.load(SCENARIO_FILE)
+            if MODE == 'load':
+                # Benchmark steps use only the scenario's endpoint mix
+                plan.requires('rate' if ENGINE == 'async' else 'users')
+        except scenario.ScenarioError as e:
+            raise SystemExit(f"Scenario error: {e}")
+        print(f"Starting stress test - Scenario: {plan.name} ({plan.duration:g}s, "
+              f"{len(plan.stages)} stages), engine: {ENGINE}, connections: {CONNECTION_MODE}")
+    else:
+        print(f"Starting stress test - Level: {STRESS_LEVEL}, engine: {ENGINE}, connections: {CONNECTION_MODE}")
+        print(f"Configuration: {config}")
+    
+    if ROLE == 'coordinator':
+        print(f"Coordinating {LOCAL_WORKERS} local and {REMOTE_WORKERS} remote workers")
+        run_coordinator(config, plan)
+        return
+    
+    if MODE == 'benchmark':
+        run_benchmark(config, plan)
+        return
+    
+    cycle = 0
+    while True:
+        cycle += 1
+        run_cycle(cycle, config, plan)
+        
+        print("Completed cycle. Waiting 10 seconds before next cycle...")
+        time.sleep(10)
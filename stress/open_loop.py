@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Open-loop load engine.
+
+Requests go out on a fixed arrival schedule, either evenly spaced or
+Poisson, whether or not earlier responses have come back. A slow target
+therefore keeps facing the offered load instead of a generator that backs
+off with it. A single asyncio loop keeps thousands of requests in flight.
+Each send is timed against its scheduled instant, so a generator that
+cannot keep up shows as schedule lag rather than as a quietly lower rate.
+"""
+import asyncio
+import random
+import resource
+
+from report import Histogram
+
+try:
+    import aiohttp
+except ImportError:  # only the async engine needs aiohttp
+    aiohttp = None
+
+ARRIVALS = ('constant', 'poisson')
+# Step over which a changing rate is treated as constant
+RATE_STEP = 0.1
+# Sends starting later than this after their scheduled time count as late
+LATE_THRESHOLD = 0.01
+
+
+def next_arrival(elapsed, rate_at, arrival, duration):
+    """Elapsed time of the send after one at `elapsed`, or None past `duration`.
+
+    Arrivals are spaced by one unit of integrated rate, or by a unit
+    exponential for Poisson (time rescaling), so ramps are followed
+    smoothly even from a rate of 0.
+    """
+    need = random.expovariate(1.0) if arrival == 'poisson' else 1.0
+    while elapsed < duration:
+        rate = rate_at(elapsed)
+        if rate * RATE_STEP >= need:
+            elapsed += need / rate
+            return elapsed if elapsed < duration else None
+        need -= rate * RATE_STEP
+        elapsed += RATE_STEP
+    return None
+
+
+def raise_fd_limit(wanted):
+    """Lift the soft open-file limit towards `wanted`; every in-flight request holds a socket"""
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            new = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (new, hard))
+    except (ValueError, OSError) as e:
+        print(f"Could not raise open-file limit: {e}")
+
+
+class OpenLoopStats:
+    """Scheduling counters for one run; only touched from the event loop thread"""
+
+    def __init__(self, duration):
+        self.duration = duration
+        self.scheduled = 0
+        self.dropped = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # Scheduled vs actual send time
+        self.lag = Histogram()
+        self.late = 0
+
+    def to_dict(self):
+        return {
+            'offered_rps': round(self.scheduled / self.duration, 2),
+            'scheduled': self.scheduled,
+            'dropped': self.dropped,
+            'max_in_flight': self.max_in_flight,
+            'late_sends': self.late,
+            'schedule_lag': self.lag.to_dict()
+        }
+
+
+async def _send(session, target_url, name, endpoint, scheduled, stats, recorder, log_requests):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    lag = max(started - scheduled, 0)
+    stats.lag.record(lag)
+    if lag > LATE_THRESHOLD:
+        stats.late += 1
+    status = error = None
+    try:
+        async with session.get(target_url + endpoint) as response:
+            await response.read()
+        status = response.status
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        error = type(e).__name__
+    finally:
+        stats.in_flight -= 1
+    recorder.record(name, loop.time() - started, status, error)
+    if log_requests:
+        print(f"Request to {endpoint} - {f'Status: {status}' if error is None else f'Error: {error}'}")
+
+
+async def run(target_url, next_endpoint, rate, duration, recorder, arrival='constant',
+              max_in_flight=10000, timeout=30, keepalive=True, log_requests=False):
+    """Send GETs at `rate`/s for `duration` s and return the scheduling stats.
+
+    `rate` is a number or a function of the seconds elapsed, for ramps.
+    next_endpoint() returns (report name, path); responses go to `recorder`.
+    """
+    rate_at = rate if callable(rate) else (lambda elapsed: rate)
+    if aiohttp is None:
+        raise RuntimeError("the async engine needs aiohttp installed")
+    if arrival not in ARRIVALS:
+        raise ValueError(f"arrival must be one of {', '.join(ARRIVALS)}")
+    raise_fd_limit(max_in_flight + 64)
+    loop = asyncio.get_running_loop()
+    stats = OpenLoopStats(duration)
+    pending = set()
+    connector = aiohttp.TCPConnector(limit=max_in_flight, force_close=not keepalive)
+    async with aiohttp.ClientSession(connector=connector,
+                                     timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        start = loop.time()
+        elapsed = 0.0
+        while True:
+            elapsed = next_arrival(elapsed, rate_at, arrival, duration)
+            if elapsed is None:
+                break
+            due = start + elapsed
+            # Always yield, even when behind schedule, so sends can progress
+            await asyncio.sleep(max(due - loop.time(), 0))
+            stats.scheduled += 1
+            if stats.in_flight >= max_in_flight:
+                # Waiting here would turn this back into a closed loop
+                stats.dropped += 1
+                continue
+            stats.in_flight += 1
+            stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            name, endpoint = next_endpoint()
+            task = asyncio.ensure_future(_send(session, target_url, name, endpoint, due,
+                                               stats, recorder, log_requests))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        # Requests still in flight are bounded by the client timeout
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        return stats.to_dict()
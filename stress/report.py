@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Latency histograms and JSON run reports for the stress generator.
+
+Latencies are counted HdrHistogram-style in log-linear microsecond
+buckets: one per value below 256 us, then 128 linear steps per power of
+two (the value's top 8 bits). Every reported percentile is therefore
+within 1/128 (under 1%) of the true value. Buckets live in a
+sparse dict, so recording is O(1) and memory stays small however many
+requests a cycle sends. A Recorder keeps a histogram plus status and error
+counters per endpoint, both for the whole cycle and for the current
+reporting interval.
+"""
+import json
+import math
+import threading
+import time
+
+SUB_BUCKET_BITS = 8
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def _bucket(us):
+    # Values below 2**SUB_BUCKET_BITS get a bucket each; above that, the
+    # top SUB_BUCKET_BITS bits of the value pick the bucket
+    shift = max(us.bit_length() - SUB_BUCKET_BITS, 0)
+    return (shift << SUB_BUCKET_BITS) + (us >> shift)
+
+
+def _bucket_high(index):
+    """Largest microsecond value that falls in bucket `index`"""
+    shift = index >> SUB_BUCKET_BITS
+    return (((index & ((1 << SUB_BUCKET_BITS) - 1)) + 1) << shift) - 1
+
+
+def _ms(us):
+    return round(us / 1000, 3) if us is not None else None
+
+
+class Histogram:
+    """Durations recorded in seconds, reported in ms"""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        us = max(int(seconds * 1000000), 0)
+        index = _bucket(us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += us
+        if self.min is None or us < self.min:
+            self.min = us
+        if self.max is None or us > self.max:
+            self.max = us
+
+    def merge(self, other):
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def percentile(self, p):
+        """p-th percentile in ms: the highest value equivalent to the ranked sample"""
+        if not self.count:
+            return None
+        rank = max(math.ceil(p / 100 * self.count), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return _ms(min(_bucket_high(index), self.max))
+        return _ms(self.max)
+
+    def to_dict(self):
+        summary = {
+            'count': self.count,
+            'min_ms': _ms(self.min),
+            'mean_ms': _ms(self.total / self.count) if self.count else None
+        }
+        for p in PERCENTILES:
+            summary[f"p{p:g}_ms"] = self.percentile(p)
+        summary['max_ms'] = _ms(self.max)
+        return summary
+
+    def to_state(self):
+        """JSON-safe counters, e.g. for sending to a coordinator"""
+        return {'counts': self.counts, 'count': self.count, 'total': self.total,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_state(cls, state):
+        histogram = cls()
+        # JSON object keys arrive as strings
+        histogram.counts = {int(index): n for index, n in state['counts'].items()}
+        histogram.count = state['count']
+        histogram.total = state['total']
+        histogram.min = state['min']
+        histogram.max = state['max']
+        return histogram
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.status_codes = {}
+        self.errors = {}
+
+    def record(self, seconds, status=None, error=None):
+        self.latency.record(seconds)
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        else:
+            status = str(status)
+            self.status_codes[status] = self.status_codes.get(status, 0) + 1
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        for code, n in other.status_codes.items():
+            self.status_codes[code] = self.status_codes.get(code, 0) + n
+        for error, n in other.errors.items():
+            self.errors[error] = self.errors.get(error, 0) + n
+        return self
+
+    def to_state(self):
+        return {'latency': self.latency.to_state(), 'status_codes': self.status_codes,
+                'errors': self.errors}
+
+    @classmethod
+    def from_state(cls, state):
+        stats = cls()
+        stats.latency = Histogram.from_state(state['latency'])
+        stats.status_codes = dict(state['status_codes'])
+        stats.errors = dict(state['errors'])
+        return stats
+
+    def to_dict(self, elapsed):
+        return {
+            'requests': self.latency.count,
+            'rps': round(self.latency.count / elapsed, 2) if elapsed else None,
+            'status_codes': dict(sorted(self.status_codes.items())),
+            'errors': dict(sorted(self.errors.items())),
+            'latency': self.latency.to_dict()
+        }
+
+
+def summarize(per_endpoint, started, finished):
+    """Totals plus a per-endpoint breakdown of {endpoint: EndpointStats}"""
+    elapsed = finished - started
+    total = EndpointStats()
+    for stats in per_endpoint.values():
+        total.merge(stats)
+    summary = {'started': round(started, 3), 'elapsed_s': round(elapsed, 3)}
+    summary.update(total.to_dict(elapsed))
+    summary['endpoints'] = {endpoint: stats.to_dict(elapsed)
+                            for endpoint, stats in sorted(per_endpoint.items())}
+    return summary
+
+
+class Recorder:
+    """Thread-safe request results for one cycle and for the current interval"""
+
+    def __init__(self):
+        self.started = time.time()
+        self._cycle = {}
+        self._interval = {}
+        self._interval_started = self.started
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds, status=None, error=None):
+        """One finished request: its HTTP status, or the name of the error it raised"""
+        with self._lock:
+            for per_endpoint in (self._cycle, self._interval):
+                stats = per_endpoint.get(endpoint)
+                if stats is None:
+                    stats = per_endpoint[endpoint] = EndpointStats()
+                stats.record(seconds, status, error)
+
+    def interval_report(self):
+        """Summary since the previous interval report, which starts a new interval"""
+        now = time.time()
+        with self._lock:
+            per_endpoint, self._interval = self._interval, {}
+            started, self._interval_started = self._interval_started, now
+        return summarize(per_endpoint, started, now)
+
+    def cycle_report(self):
+        with self._lock:
+            return summarize(self._cycle, self.started, time.time())
+
+    def cycle_state(self):
+        """The whole cycle in JSON-safe form; see merge_states()"""
+        with self._lock:
+            return {'started': self.started, 'finished': time.time(),
+                    'endpoints': {endpoint: stats.to_state() for endpoint, stats in self._cycle.items()}}
+
+
+def merge_states(states):
+    """One summary from several recorders' cycle_state(), spanning all of them"""
+    per_endpoint = {}
+    for state in states:
+        for endpoint, stats in state['endpoints'].items():
+            per_endpoint.setdefault(endpoint, EndpointStats()).merge(EndpointStats.from_state(stats))
+    if not states:
+        now = time.time()
+        return summarize(per_endpoint, now, now)
+    return summarize(per_endpoint, min(state['started'] for state in states),
+                     max(state['finished'] for state in states))
+
+
+class IntervalReporter:
+    """Background thread passing recorder.interval_report() to `emit` every `interval` s"""
+
+    def __init__(self, recorder, interval, emit):
+        self.recorder = recorder
+        self.interval = interval
+        self.emit = emit
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='interval-report', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            self.emit(self.recorder.interval_report())
+
+
+def emit(summary, path=None):
+    """Print `summary` as one JSON line, also appending it to `path` if given"""
+    line = json.dumps(summary)
+    print(line, flush=True)
+    if path:
+        with open(path, 'a') as f:
+            f.write(line + '\n')
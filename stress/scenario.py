@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Scenario files: declarative workloads for the stress generator.
+
+A scenario (YAML or JSON) lists weighted endpoints with query parameters,
+a think-time distribution, and stages that ramp the load over time:
+
+    name: checkout-spike
+    think_time: {distribution: exponential, mean: 0.5}
+    endpoints:
+      - path: /api/cpu-intensive
+        weight: 3
+        params: {iterations: {min: 50000, max: 200000}}
+      - path: /api/memory-intensive
+        params: {size_mb: [5, 10, 20]}
+    stages:
+      - {name: warm-up, duration: 30, users: 10, rate: 20}
+      - {name: step, duration: 60, users: 20, rate: 50, ramp: step}
+      - {name: spike, duration: 10, users: 100, rate: 400}
+      - {name: soak, duration: 600, users: 20, rate: 50}
+
+`users` is the number of concurrent users for the threads engine, and
+`rate` the arrivals per second for the async engine. Each stage moves
+linearly from the previous stage's value (0 before the first stage) to
+its own over its duration, or jumps there at once with `ramp: step`. A
+parameter is a fixed value, a list to pick from, or {min, max} for a
+random integer. Think time only applies to the threads engine's users,
+since open-loop arrivals do not wait on responses.
+"""
+import json
+import random
+from urllib.parse import urlencode
+
+try:
+    import yaml
+except ImportError:  # JSON scenarios work without PyYAML
+    yaml = None
+
+RAMPS = ('linear', 'step')
+# Think-time distributions and the keys each one needs
+THINK_TIMES = {
+    'none': (),
+    'constant': ('value',),
+    'uniform': ('min', 'max'),
+    'exponential': ('mean',),
+    'normal': ('mean',)
+}
+TARGETS = ('users', 'rate')
+
+
+class ScenarioError(ValueError):
+    """The scenario file is missing, unreadable or malformed"""
+
+
+def _number(value, what, minimum=0):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < minimum:
+        raise ScenarioError(f"{what} must be a number >= {minimum}, got {value!r}")
+    return value
+
+
+def _param_value(value):
+    if isinstance(value, list):
+        return random.choice(value)
+    if isinstance(value, dict):
+        return random.randint(value['min'], value['max'])
+    return value
+
+
+class Endpoint:
+    def __init__(self, spec):
+        if not isinstance(spec, dict) or not str(spec.get('path', '')).startswith('/'):
+            raise ScenarioError(f"endpoint needs a path starting with '/': {spec!r}")
+        self.path = spec['path']
+        self.name = spec.get('name', self.path)
+        self.weight = _number(spec.get('weight', 1), f"{self.name} weight")
+        self.params = spec.get('params') or {}
+        for key, value in self.params.items():
+            if isinstance(value, list) and not value:
+                raise ScenarioError(f"{self.name} param {key} has no values to pick from")
+            if isinstance(value, dict) and not (isinstance(value.get('min'), int)
+                                                and isinstance(value.get('max'), int)
+                                                and value['min'] <= value['max']):
+                raise ScenarioError(f"{self.name} param {key} needs integer min <= max")
+
+    def url_path(self):
+        """Path plus a query string with this request's parameter values"""
+        if not self.params:
+            return self.path
+        query = urlencode({key: _param_value(value) for key, value in self.params.items()})
+        return f"{self.path}?{query}"
+
+
+class Stage:
+    def __init__(self, spec, index):
+        if not isinstance(spec, dict):
+            raise ScenarioError(f"stage {index} must be a mapping, got {spec!r}")
+        self.name = spec.get('name', f"stage-{index}")
+        self.duration = _number(spec.get('duration'), f"{self.name} duration")
+        self.ramp = spec.get('ramp', 'linear')
+        if self.ramp not in RAMPS:
+            raise ScenarioError(f"{self.name} ramp must be one of {', '.join(RAMPS)}")
+        self.targets = {key: _number(spec[key], f"{self.name} {key}")
+                        for key in TARGETS if key in spec}
+        if not self.targets:
+            raise ScenarioError(f"{self.name} needs users and/or rate")
+
+
+class Scenario:
+    def __init__(self, spec, source='scenario'):
+        if not isinstance(spec, dict):
+            raise ScenarioError(f"{source} must be a mapping at the top level")
+        # Kept as loaded so a coordinator can pass it on to its workers
+        self.spec = spec
+        self.name = spec.get('name', source)
+        self.endpoints = [Endpoint(e) for e in spec.get('endpoints') or []]
+        if not self.endpoints:
+            raise ScenarioError(f"{self.name} has no endpoints")
+        self.weights = [e.weight for e in self.endpoints]
+        if not sum(self.weights):
+            raise ScenarioError(f"{self.name} endpoint weights add up to 0")
+        self.stages = [Stage(s, i) for i, s in enumerate(spec.get('stages') or [])]
+        if not self.stages:
+            raise ScenarioError(f"{self.name} has no stages")
+        self.duration = sum(stage.duration for stage in self.stages)
+        self.think = spec.get('think_time', 0)
+        if isinstance(self.think, (int, float)):
+            self.think = {'distribution': 'constant', 'value': self.think}
+        if not isinstance(self.think, dict) or self.think.get('distribution', 'none') not in THINK_TIMES:
+            raise ScenarioError(f"think_time must be seconds or have a distribution "
+                                f"of {', '.join(THINK_TIMES)}")
+        for key in THINK_TIMES[self.think.get('distribution', 'none')]:
+            _number(self.think.get(key), f"think_time {key}")
+
+    def choose(self):
+        """(report name, path with query) of a weighted-random endpoint"""
+        endpoint = random.choices(self.endpoints, weights=self.weights)[0]
+        return endpoint.name, endpoint.url_path()
+
+    def think_time(self):
+        """Seconds a user waits after a response before its next request"""
+        think = self.think
+        distribution = think.get('distribution', 'none')
+        if distribution == 'constant':
+            return think.get('value', 0)
+        if distribution == 'uniform':
+            return random.uniform(think['min'], think['max'])
+        if distribution == 'exponential':
+            return random.expovariate(1 / think['mean']) if think['mean'] > 0 else 0
+        if distribution == 'normal':
+            return max(random.gauss(think['mean'], think.get('stddev', 0)), 0)
+        return 0
+
+    def requires(self, target):
+        """Raise unless every stage sets `target` ('users' or 'rate')"""
+        missing = [stage.name for stage in self.stages if target not in stage.targets]
+        if missing:
+            raise ScenarioError(f"{self.name} stages {', '.join(missing)} need {target}")
+
+    def max_target(self, target):
+        return max(stage.targets[target] for stage in self.stages)
+
+    def stage_at(self, elapsed):
+        """Stage running at `elapsed` s, or None once the scenario is over"""
+        stage_start = 0
+        for stage in self.stages:
+            stage_start += stage.duration
+            if elapsed < stage_start:
+                return stage
+        return None
+
+    def target_at(self, elapsed, target):
+        """Users or rate at `elapsed` s, following each stage's ramp"""
+        previous = 0
+        stage_start = 0
+        for stage in self.stages:
+            value = stage.targets[target]
+            if elapsed < stage_start + stage.duration:
+                if stage.ramp == 'step':
+                    return value
+                return previous + (value - previous) * (elapsed - stage_start) / stage.duration
+            previous = value
+            stage_start += stage.duration
+        return 0
+
+
+def load(path):
+    """Read a .yaml/.yml or .json scenario file"""
+    is_yaml = path.endswith(('.yaml', '.yml'))
+    if is_yaml and yaml is None:
+        raise ScenarioError("YAML scenarios need PyYAML installed; use JSON instead")
+    errors = (OSError, ValueError) + ((yaml.YAMLError,) if yaml is not None else ())
+    try:
+        with open(path) as f:
+            spec = yaml.safe_load(f) if is_yaml else json.load(f)
+    except errors as e:
+        raise ScenarioError(f"cannot read scenario {path}: {e}")
+    return Scenario(spec, source=path)
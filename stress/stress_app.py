@@ -1,56 +1,29 @@
 #!/usr/bin/env python3
-import os
-import time
+"""
+Stress generator for the nginx target: its stress levels and endpoints.
+The engines, reports, scenarios, coordination and benchmark mode are the
+shared driver in driver.py.
+"""
 import random
-import requests
-import threading
-from concurrent.futures import ThreadPoolExecutor
 
-TARGET_URL = os.getenv('TARGET_URL', 'http://web-app')
-STRESS_LEVEL = os.getenv('STRESS_LEVEL', 'low')
+import driver
 
 # Stress level configurations
 STRESS_CONFIGS = {
-    'low': {'threads': 5, 'requests_per_thread': 10, 'delay': 0.5},
-    'medium': {'threads': 20, 'requests_per_thread': 100, 'delay': 0.1},
-    'high': {'threads': 50, 'requests_per_thread': 200, 'delay': 0.05},
-    'extreme': {'threads': 100, 'requests_per_thread': 5000, 'delay': 0.001},
-    'cpu-intensive': {'threads': 200, 'requests_per_thread': 1000, 'delay': 0.001}
+    'low': {'threads': 5, 'requests_per_thread': 10, 'delay': 0.5, 'rate': 10},
+    'medium': {'threads': 20, 'requests_per_thread': 100, 'delay': 0.1, 'rate': 200},
+    'high': {'threads': 50, 'requests_per_thread': 200, 'delay': 0.05, 'rate': 1000},
+    'extreme': {'threads': 100, 'requests_per_thread': 5000, 'delay': 0.001, 'rate': 5000},
+    'cpu-intensive': {'threads': 200, 'requests_per_thread': 1000, 'delay': 0.001, 'rate': 5000}
 }
 
-def generate_load(thread_id, config):
-    """Generate load on the target application"""
-    for i in range(config['requests_per_thread']):
-        try:
-            # Random endpoints to vary the load
-            endpoints = ['/', '/index.html', '/health', '/non-existent']
-            endpoint = random.choice(endpoints)
-            
-            response = requests.get(f"{TARGET_URL}{endpoint}", timeout=5)
-            print(f"Thread {thread_id}: Request {i+1} to {endpoint} - Status: {response.status_code}")
-            
-            time.sleep(config['delay'])
-        except Exception as e:
-            print(f"Thread {thread_id}: Error - {str(e)}")
+# Random endpoints to vary the load
+ENDPOINTS = ['/', '/index.html', '/health', '/non-existent']
 
-def main():
-    config = STRESS_CONFIGS.get(STRESS_LEVEL, STRESS_CONFIGS['low'])
-    print(f"Starting stress test - Level: {STRESS_LEVEL}")
-    print(f"Configuration: {config}")
-    
-    while True:
-        with ThreadPoolExecutor(max_workers=config['threads']) as executor:
-            futures = []
-            for i in range(config['threads']):
-                future = executor.submit(generate_load, i, config)
-                futures.append(future)
-            
-            # Wait for all threads to complete
-            for future in futures:
-                future.result()
-        
-        print(f"Completed cycle. Waiting 10 seconds before next cycle...")
-        time.sleep(10)
+def choose_endpoint(config):
+    """(report name, path) of a random endpoint for this level"""
+    endpoint = random.choice(ENDPOINTS)
+    return endpoint, endpoint
 
 if __name__ == "__main__":
-    main()
+    driver.main(STRESS_CONFIGS, choose_endpoint, request_timeout=5, script=__file__)